@@ -1,5 +1,5 @@
 from imapclient import IMAPClient
-from email.parser import BytesParser
+from email.parser import BytesParser, BytesHeaderParser
 from email import policy
 from email.message import EmailMessage
 from email.utils import make_msgid
@@ -17,6 +17,73 @@ def connect(host: str, user: str, password: str, port: int = 993, ssl: bool = Tr
     return client
 
 
+# --- Connection reuse across scheduler ticks ---
+# connect+login 在部分服务器上要数秒；同一账号的连接在任务之间缓存复用，
+# 取用时 NOOP 探活，失败才重建。
+import threading as _threading
+
+_IMAP_CACHE: dict[tuple, list[IMAPClient]] = {}
+_IMAP_CACHE_LOCK = _threading.Lock()
+_IMAP_LEASED_KEYS: dict[int, tuple] = {}
+# 每账号最多缓存几条空闲连接：主连接 + 扫描辅助池（上限 4 条）
+_IMAP_CACHE_MAX_PER_KEY = 5
+
+
+def lease_imap(host: str, user: str, password: str, port: int = 993, ssl: bool = True) -> IMAPClient:
+    """Hand out a cached, liveness-checked connection (or a fresh one).
+
+    Callers must return it with release_imap; a connection released as broken
+    (or mid-exception) is closed instead of being cached.
+    """
+    key = (host, user, int(port), bool(ssl))
+    client = None
+    while True:
+        with _IMAP_CACHE_LOCK:
+            pool = _IMAP_CACHE.get(key)
+            client = pool.pop() if pool else None
+        if client is None:
+            break
+        try:
+            client.noop()
+            break
+        except Exception:
+            try:
+                client.shutdown()
+            except Exception:
+                pass
+            client = None
+    if client is None:
+        client = connect(host, user, password, port=port, ssl=ssl)
+    _IMAP_LEASED_KEYS[id(client)] = key
+    return client
+
+
+def release_imap(client: IMAPClient, broken: bool = False):
+    """Return a leased connection to the cache, or close it when broken."""
+    if client is None:
+        return
+    key = _IMAP_LEASED_KEYS.pop(id(client), None)
+    if broken or key is None:
+        try:
+            client.logout()
+        except Exception:
+            try:
+                client.shutdown()
+            except Exception:
+                pass
+        return
+    with _IMAP_CACHE_LOCK:
+        pool = _IMAP_CACHE.setdefault(key, [])
+        if len(pool) < _IMAP_CACHE_MAX_PER_KEY:
+            pool.append(client)
+            return
+    # 该账号的缓存已满；多余的连接直接关闭
+    try:
+        client.logout()
+    except Exception:
+        pass
+
+
 def search_unseen_without_prefix(
     client: IMAPClient,
     folder: str,
@@ -62,10 +129,93 @@ def fetch_raw(client: IMAPClient, uid: int) -> bytes:
     return data[uid][b"BODY[]"]
 
 
+def fetch_raw_bulk(client: IMAPClient, uids: Sequence[int], batch: int = 100):
+    """Yield (uid, raw_bytes) using chunked multi-UID FETCH.
+
+    One UID FETCH per `batch` uids replaces the per-message round-trip of
+    fetch_raw; yielding lazily keeps early-exit callers from transferring
+    bodies they will never look at.
+    """
+    seq = [int(u) for u in uids]
+    for i in range(0, len(seq), batch):
+        chunk = seq[i:i + batch]
+        try:
+            data = client.fetch(chunk, [b"BODY.PEEK[]"])
+        except Exception:
+            data = None
+        if not isinstance(data, dict):
+            # fall back to per-uid fetch so one bad chunk doesn't drop messages
+            for uid in chunk:
+                try:
+                    yield uid, fetch_raw(client, uid)
+                except Exception:
+                    continue
+            continue
+        for uid in chunk:
+            info = data.get(uid)
+            raw = info.get(b"BODY[]") if isinstance(info, dict) else None
+            if raw is not None:
+                yield uid, raw
+
+
+def list_headers(
+    client: IMAPClient,
+    uids: Sequence[int],
+    fields: Sequence[str] = ("Subject", "From", "Message-ID"),
+    batch: int = 200,
+) -> dict:
+    """Fetch only selected header fields for uids, parsed into Message objects.
+
+    Header responses are tiny compared with full bodies, which makes them a
+    cheap prefilter before deciding which messages deserve a body fetch.
+    Returns a dict uid -> Message; uids whose header fetch failed are absent.
+    """
+    joined = " ".join(f.upper() for f in fields)
+    spec = f"BODY.PEEK[HEADER.FIELDS ({joined})]".encode()
+    resp_key = f"BODY[HEADER.FIELDS ({joined})]".encode()
+    parser = BytesParser(policy=policy.default)
+    out: dict[int, Any] = {}
+    seq = [int(u) for u in uids]
+    for i in range(0, len(seq), batch):
+        chunk = seq[i:i + batch]
+        try:
+            data = client.fetch(chunk, [spec])
+        except Exception:
+            continue
+        if not isinstance(data, dict):
+            continue
+        for uid in chunk:
+            info = data.get(uid)
+            if not isinstance(info, dict):
+                continue
+            raw = info.get(resp_key)
+            if raw is None:
+                # some servers answer under a slightly different BODY[...] key
+                for k, v in info.items():
+                    if isinstance(k, bytes) and k.startswith(b"BODY[HEADER"):
+                        raw = v
+                        break
+            if raw is None:
+                continue
+            try:
+                out[uid] = parser.parsebytes(raw)
+            except Exception:
+                continue
+    return out
+
+
 def parse_message(raw_bytes: bytes):
     return BytesParser(policy=policy.default).parsebytes(raw_bytes)
 
 
+def parse_headers(raw_bytes: bytes):
+    """Header-only parse: skips MIME body decoding entirely.
+
+    过滤阶段只看 Subject/From 等头部时用它，正文可能有几 MB，
+    整树解析纯属浪费。"""
+    return BytesHeaderParser(policy=policy.default).parsebytes(raw_bytes)
+
+
 def pick_html_or_text(msg) -> tuple[str, str]:
     html_part = None
     text_part = None
@@ -244,6 +394,23 @@ def mark_seen(client: IMAPClient, folder: str, uid: int):
     client.add_flags([uid], [b"\\Seen"])  # make original read
 
 
+def mark_seen_bulk(client: IMAPClient, folder: str, uids: Sequence[int]):
+    """Mark many messages read with a single multi-UID STORE round-trip."""
+    uids = [int(u) for u in uids]
+    if not uids:
+        return
+    client.select_folder(folder)
+    try:
+        client.add_flags(uids, [b"\\Seen"])
+    except Exception:
+        # a vanished uid can fail the whole command on some servers; retry one by one
+        for uid in uids:
+            try:
+                client.add_flags([uid], [b"\\Seen"])
+            except Exception:
+                continue
+
+
 def mark_unseen(client: IMAPClient, folder: str, uid: int):
     client.select_folder(folder)
     client.remove_flags([uid], [b"\\Seen"])  # ensure unread
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from bs4 import BeautifulSoup, NavigableString
+import hashlib
 import logging
+import re
+from collections import OrderedDict
 from copy import deepcopy
 from premailer import transform as inline_css
 
@@ -21,15 +24,24 @@ BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "ol", "ul"}
 EXTRA_BLOCKLIKE = {"div", "section", "article"}
 
 
-def _has_ancestor_with_keywords(tag, keywords: tuple[str, ...]) -> bool:
+# 祖先链上的页眉/页脚/法律声明类标记：一条预编译交替正则（IGNORECASE）
+# 代替每层祖先 ~17 次 Python 级子串扫描和 lower() 拷贝
+_CHROME_KEYWORD_RE = re.compile(
+    r"header|footer|nav|menu|banner|masthead|logo|brand|unsubscribe|privacy|"
+    r"copyright|legal|terms|support|help|social|share",
+    re.IGNORECASE,
+)
+
+
+def _has_ancestor_with_keywords(tag) -> bool:
     cur = tag
     depth = 0
     while cur and depth < 20:
-        classes = " ".join(cur.get("class", [])).lower()
-        idv = str(cur.get("id", "")).lower()
         role = (cur.get("role") or "").lower()
-        blob = f"{classes} {idv}".strip()
-        if any(k in blob for k in keywords) or role in ("banner", "navigation", "contentinfo"):
+        if role in ("banner", "navigation", "contentinfo"):
+            return True
+        classes = " ".join(cur.get("class", []))
+        if _CHROME_KEYWORD_RE.search(classes) or _CHROME_KEYWORD_RE.search(str(cur.get("id", ""))):
             return True
         cur = cur.parent
         depth += 1
@@ -61,7 +73,7 @@ def _ancestor_has_colored_bg(tag) -> bool:
     return False
 
 
-def _is_valid_node(tag) -> bool:
+def _is_valid_node(tag, txt: str | None = None) -> bool:
     if not getattr(tag, 'name', None):
         return False
     if tag.get(MARK_ATTR) == 'copiedNode':
@@ -79,22 +91,26 @@ def _is_valid_node(tag) -> bool:
     if tag.find(["script", "style", "textarea", "svg", "iframe", "video", "form", "button"]):
         return False
     # header/footer/nav/legal etc.
-    if _has_ancestor_with_keywords(tag, (
-        "header", "footer", "nav", "menu", "banner", "masthead", "logo", "brand",
-        "unsubscribe", "privacy", "copyright", "legal", "terms", "support", "help",
-        "social", "share"
-    )):
+    if _has_ancestor_with_keywords(tag):
         return False
     # hero-like background
     if _ancestor_has_colored_bg(tag):
         return False
     # image-only paragraph heuristic
-    if tag.name.lower() == 'p' and tag.find('img') and len(list(tag.children)) < 3:
-        inner = tag.get_text(strip=True)
-        if len(inner) < 80:
-            return False
-    # final text check
-    txt = tag.get_text(" ", strip=True)
+    if tag.name.lower() == 'p' and tag.find('img'):
+        # 只需要知道子节点是否少于 3 个，数到 3 就停，不必整个列表物化
+        n_children = 0
+        for _ in tag.children:
+            n_children += 1
+            if n_children >= 3:
+                break
+        if n_children < 3:
+            inner = tag.get_text(strip=True)
+            if len(inner) < 80:
+                return False
+    # final text check（调用方已有整树文本时直接传入，省一次子树遍历）
+    if txt is None:
+        txt = tag.get_text(" ", strip=True)
     return bool(txt) and len(txt) >= 3
 
 
@@ -140,6 +156,11 @@ def _has_block_children(el) -> bool:
 
 
 def _collect_candidates(root) -> list:
+    """Return (element, text) pairs in document order.
+
+    get_text 会遍历整个子树，原来在校验、过滤、建段三处各跑一遍；
+    现在每个候选只取一次文本，顺着返回值带给注入方。
+    """
     # document order
     picked = []
     picked_set = set()
@@ -158,12 +179,11 @@ def _collect_candidates(root) -> list:
             consider = False
         if not consider:
             continue
-        if not _is_valid_node(el):
-            continue
-        # ensure non-trivial text
         txt = el.get_text(" ", strip=True) or ""
         if len(txt) < 3:
             continue
+        if not _is_valid_node(el, txt):
+            continue
         # skip if ancestor already picked
         anc = el.parent
         dup = False
@@ -174,7 +194,7 @@ def _collect_candidates(root) -> list:
             anc = getattr(anc, 'parent', None)
         if dup:
             continue
-        picked.append(el)
+        picked.append((el, txt))
         picked_set.add(id(el))
     return picked
 
@@ -213,9 +233,21 @@ def _replace_clone_text_preserving_structure(clone, translated: str):
         n.replace_with(chunk)
 
 
+# premailer 是确定性的纯变换但相当慢（cssutils 逐条解析样式表）；
+# 按内容哈希缓存结果，同一封邮件的重试/重跑不再重复整套 CSS 内联。
+# 失败（外链 CSS 超时等）不入缓存，下次仍有机会成功
+_INLINE_CACHE: OrderedDict[bytes, str] = OrderedDict()
+_INLINE_CACHE_MAX = 64
+
+
 def _safe_inline(html: str) -> str:
+    key = hashlib.blake2b(html.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    cached = _INLINE_CACHE.get(key)
+    if cached is not None:
+        _INLINE_CACHE.move_to_end(key)
+        return cached
     try:
-        return inline_css(html)
+        out = inline_css(html)
     except Exception as e:
         # Avoid network 403/timeout from external CSS; fall back to raw HTML
         try:
@@ -223,11 +255,20 @@ def _safe_inline(html: str) -> str:
         except Exception:
             pass
         return html
+    _INLINE_CACHE[key] = out
+    if len(_INLINE_CACHE) > _INLINE_CACHE_MAX:
+        _INLINE_CACHE.popitem(last=False)
+    return out
 
 
 def inject_bilingual_html(html: str, translate_batch):
     # inline css first to preserve styles across mail clients (but be resilient)
-    soup = BeautifulSoup(_safe_inline(html), "html5lib")
+    soup = BeautifulSoup(_safe_inline(html), "lxml")
+    _inject_bilingual_soup(soup, translate_batch)
+    return str(soup)
+
+
+def _inject_bilingual_soup(soup: BeautifulSoup, translate_batch) -> int:
     # detect main content container(s)
     roots = _find_content_container(soup)
     # collect candidates
@@ -235,22 +276,15 @@ def inject_bilingual_html(html: str, translate_batch):
     for r in roots:
         cands.extend(_collect_candidates(r))
     if not cands:
-        return str(soup)
+        return 0
 
-    # build segments
-    segs = []
-    useful = []
-    for el in cands:
-        txt = el.get_text(" ", strip=True)
-        if txt:
-            segs.append(txt)
-            useful.append(el)
-    if not segs:
-        return str(soup)
+    # build segments（文本已随候选带出，非空有保证）
+    useful = [el for el, _txt in cands]
+    segs = [txt for _el, txt in cands]
 
     outs = translate_batch(segs)
     if not outs:
-        return str(soup)
+        return 0
 
     # inject clones
     for el, tr in zip(useful, outs):
@@ -298,10 +332,9 @@ def inject_bilingual_html(html: str, translate_batch):
             # preserve existing inline style as-is; do not change font/size/color
             _replace_clone_text_preserving_structure(clone, tr or '')
             el.insert_after(clone)
-    return str(soup)
+    return len(useful)
 
 # --- Conservative fallback: line-by-line English detection ---
-import re
 
 def _looks_like_style_or_code(s: str) -> bool:
     # Heuristic: avoid CSS/HTML-like blobs in text nodes
@@ -382,7 +415,12 @@ def inject_bilingual_html_conservative(html: str, translate_batch):
     Robust per-block injection: for typical text blocks (p/li/h*/td/th/div without nested blocks)
     append one next-line translation inside the same block.
     """
-    soup = BeautifulSoup(_safe_inline(html), 'html5lib')
+    soup = BeautifulSoup(_safe_inline(html), 'lxml')
+    _inject_conservative_soup(soup, translate_batch)
+    return str(soup)
+
+
+def _inject_conservative_soup(soup: BeautifulSoup, translate_batch) -> int:
     elems = []
     picked_set = set()
 
@@ -447,7 +485,7 @@ def inject_bilingual_html_conservative(html: str, translate_batch):
             picked_set.add(id(el))
             seen.add(id(el))
     if not elems:
-        return str(soup)
+        return 0
 
     segs = [e.get_text(' ', strip=True) for e in elems]
     outs = []
@@ -458,7 +496,7 @@ def inject_bilingual_html_conservative(html: str, translate_batch):
             part = [''] * len(segs[i:i+CHUNK])
         outs.extend(part)
     if not outs:
-        return str(soup)
+        return 0
 
     for el, tr in zip(elems, outs):
         try:
@@ -503,7 +541,7 @@ def inject_bilingual_html_conservative(html: str, translate_batch):
                 el.insert_after(clone)
         except Exception:
             continue
-    return str(soup)
+    return len(elems)
 
 # Ultra-naive: per inline segment right-after placement
 INLINE_TAGS = set(['a','span','em','strong','b','i','u','small','sup','sub','mark','code'])
@@ -521,7 +559,12 @@ def inject_bilingual_html_linewise(html: str, translate_batch):
     whenever a child segment contains English, translate it and insert a new blocky span/div
     immediately after that segment (not at the end of the container).
     """
-    soup = BeautifulSoup(_safe_inline(html), 'html5lib')
+    soup = BeautifulSoup(_safe_inline(html), 'lxml')
+    _inject_linewise_soup(soup, translate_batch)
+    return str(soup)
+
+
+def _inject_linewise_soup(soup: BeautifulSoup, translate_batch) -> int:
     segments = []  # list of (node, text, mode)
 
     def push_segment(node, text):
@@ -577,7 +620,7 @@ def inject_bilingual_html_linewise(html: str, translate_batch):
         flush_buffer()
 
     if not segments:
-        return str(soup)
+        return 0
 
     texts = [t for _, t in segments]
     outs = []
@@ -616,6 +659,22 @@ def inject_bilingual_html_linewise(html: str, translate_batch):
         except Exception:
             continue
 
+    return len(segments)
+
+
+def inject_bilingual_html_two_pass(html: str, translate_batch, linewise: bool = True):
+    """
+    Primary pass (linewise or container-based) plus the conservative fallback on
+    ONE shared soup. 原实现在两趟之间序列化再重新 inline CSS + 解析，
+    整封邮件要走两遍 premailer/parser；共享同一棵树后兜底趟只是一次 DOM 遍历，
+    且 copiedNode 标记天然让它跳过已注入的块。
+    """
+    soup = BeautifulSoup(_safe_inline(html), 'lxml')
+    if linewise:
+        _inject_linewise_soup(soup, translate_batch)
+    else:
+        _inject_bilingual_soup(soup, translate_batch)
+    _inject_conservative_soup(soup, translate_batch)
     return str(soup)
 
 
@@ -632,7 +691,7 @@ def translate_html_inplace(html: str, translate_batch):
     - Between original and translation, insert exactly one space
     - Preserves surrounding whitespace and newlines exactly
     """
-    soup = BeautifulSoup(_safe_inline(html), 'html5lib')
+    soup = BeautifulSoup(_safe_inline(html), 'lxml')
 
     # Build translation requests by scanning text nodes
     requests = []  # list[str]
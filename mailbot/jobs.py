@@ -8,9 +8,12 @@ from datetime import datetime
 import json
 from pathlib import Path as _Path
 from premailer import transform as inline_css
+import orjson
 import re
+import sys
 import urllib.error
 import urllib.request
+import httpx
 
 logger = logging.getLogger("mailbot")
 
@@ -25,61 +28,100 @@ def _ensure_data_dir():
         pass
 
 
-def _save_summary_payload(entries: list[dict], path: Path | None = None, meta: dict | None = None):
-    # Always persist a record file for observability, even if empty
-    _ensure_data_dir()
-    if path is None:
-        ts = datetime.now().strftime('%Y%m%d-%H%M%S')
-        path = _DATA_DIR / f'summarize-{ts}.json'
-    payload = {"meta": meta or {}, "entries": entries or []}
-    try:
-        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
-        logger.info(f"已保存本次机器总结的请求与结果到文件: {path}")
-    except Exception as e:
-        logger.info(f"保存机器总结 payload 文件失败: {e}")
+class _SummaryRunLog:
+    """Append-only recorder for one summarize run.
+
+    以前每次 checkpoint 都把 {meta, entries} 整体重写一遍，N 条 entry
+    累计要写 O(N^2) 字节；改为 entry 逐行追加到 .jsonl、meta 单独落一个
+    小 sidecar 文件后，总写入量回到 O(N)。path 为 None 时所有操作皆为
+    空操作（save_summary_json 关闭的场景）。
+    """
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.meta_path = path.with_suffix('.meta.json') if path is not None else None
+        self._fh = None
+
+    def append(self, entry: dict):
+        if self.path is None:
+            return
+        try:
+            if self._fh is None:
+                _ensure_data_dir()
+                self._fh = self.path.open('ab')
+            # orjson 直接产出 UTF-8 bytes，省掉 str 中转和纯 Python 序列化
+            self._fh.write(orjson.dumps(entry) + b"\n")
+            self._fh.flush()
+        except Exception as e:
+            logger.info(f"追加机器总结 payload 行失败: {e}")
+
+    def save_meta(self, meta: dict | None):
+        if self.meta_path is None:
+            return
+        try:
+            _ensure_data_dir()
+            self.meta_path.write_bytes(orjson.dumps(meta or {}, option=orjson.OPT_INDENT_2))
+            logger.info(f"已保存本次机器总结的请求与结果到文件: {self.path}")
+        except Exception as e:
+            logger.info(f"保存机器总结 payload 文件失败: {e}")
+
+    def close(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
+
+
+# 插进 HTML 模板的模型输出/邮件主题可能混入 <>&"'，用一张 translate
+# 表一次 C 级扫描完成转义（比 html.escape 的多次 replace 便宜）
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'})
+
+# 列表行解析：一条预编译正则一次 findall 搞定逐行 strip + 去项目符号，
+# 空行自然不匹配
+_BULLET_RE = re.compile(r'(?m)^[ \t]*(?:[-•*][ \t]+)?(\S.*?)[ \t\r]*$')
+
+
+
+# 文章卡片的固定 HTML 片段：模块级常量化，每张卡片只做
+# 「常量 + 动态值」的一趟 join，不再逐卡重组长字面量
+_CARD_PARTS = (
+    "\n<div style=\"border:1px solid #e5e7eb;border-radius:10px;padding:10px 12px;margin:10px 0;\">\n"
+    "  <div style=\"font-weight:700;font-size:15px;line-height:1.35;margin-bottom:6px;\">\n"
+    "    <span style=\"color:#111827;\">中文标题：</span><span style=\"color:#111827;\">",
+    "</span>\n  </div>\n"
+    "  <div style=\"font-size:12px;color:#374151;margin-bottom:4px;\">English Title: ",
+    "</div>\n  ",
+    "\n  <div style=\"font-size:12px;color:#6b7280;margin-bottom:6px;\">Authors: ",
+    "</div>\n  <div>\n"
+    "    <div style=\"font-weight:600;color:#111827;margin-bottom:4px;\">要点</div>\n"
+    "    <ul style=\"margin:0;padding-left:18px;\">",
+    "</ul>\n    <div style=\"font-size:12px;color:#059669;margin-top:6px;\">相关性：",
+    "</div>\n  </div>\n</div>\n",
+)
+_CARD_JOURNAL_OPEN = "<div style=\"font-size:12px;color:#4b5563;margin-bottom:4px;\">期刊/来源："
+_CARD_JOURNAL_CLOSE = "</div>"
 
 
 def _article_card_html(a: dict) -> str:
-    tzh = (a.get('title_zh') or '').strip()
-    ten = (a.get('title_en') or '').strip()
-    authors = (a.get('authors') or '').strip()
-    journal = (a.get('journal') or '').strip()
-    bullets = [b for b in (a.get('bullets') or []) if (b or '').strip()]
-    rel = (a.get('relevance') or '').strip()
-    journal_html = (
-        f"<div style=\"font-size:12px;color:#4b5563;margin-bottom:4px;\">期刊/来源：{journal}</div>"
-        if journal else ""
-    )
+    tzh = (a.get('title_zh') or '').strip().translate(_HTML_ESCAPE)
+    ten = (a.get('title_en') or '').strip().translate(_HTML_ESCAPE)
+    authors = (a.get('authors') or '').strip().translate(_HTML_ESCAPE)
+    journal = (a.get('journal') or '').strip().translate(_HTML_ESCAPE)
+    bullets = [b.strip().translate(_HTML_ESCAPE) for b in (a.get('bullets') or []) if (b or '').strip()]
+    rel = (a.get('relevance') or '').strip().translate(_HTML_ESCAPE)
+    journal_html = (_CARD_JOURNAL_OPEN + journal + _CARD_JOURNAL_CLOSE) if journal else ""
     lis = ''.join(f"<li>{b}</li>" for b in bullets[:3])
-    return f"""
-<div style=\"border:1px solid #e5e7eb;border-radius:10px;padding:10px 12px;margin:10px 0;\">
-  <div style=\"font-weight:700;font-size:15px;line-height:1.35;margin-bottom:6px;\">
-    <span style=\"color:#111827;\">中文标题：</span><span style=\"color:#111827;\">{tzh}</span>
-  </div>
-  <div style=\"font-size:12px;color:#374151;margin-bottom:4px;\">English Title: {ten}</div>
-  {journal_html}
-  <div style=\"font-size:12px;color:#6b7280;margin-bottom:6px;\">Authors: {authors}</div>
-  <div>
-    <div style=\"font-weight:600;color:#111827;margin-bottom:4px;\">要点</div>
-    <ul style=\"margin:0;padding-left:18px;\">{lis}</ul>
-    <div style=\"font-size:12px;color:#059669;margin-top:6px;\">相关性：{rel}</div>
-  </div>
-</div>
-"""
-
-
-def _render_summary_html(items: list[tuple[object, str]], folder: str) -> str:
+    p = _CARD_PARTS
+    return ''.join((p[0], tzh, p[1], ten, p[2], journal_html, p[3], authors, p[4], lis, p[5], rel, p[6]))
+
+
+def _render_summary_html(items: list[tuple[object, str]], folder: str, inline_css_enabled: bool = False) -> str:
     # items: list of (message, summary_text or rendered HTML)
     now = datetime.now().strftime('%Y-%m-%d %H:%M')
     def _bullets(text: str) -> str:
-        lines = [l.strip() for l in (text or '').splitlines()]
-        lis = []
-        for l in lines:
-            if not l:
-                continue
-            if l.startswith(('- ', '• ', '* ')):
-                l = l[2:].strip()
-            lis.append(f"<li>{l}</li>")
+        lis = [f"<li>{m}</li>" for m in _BULLET_RE.findall(text or '')]
         return "<ul style=\"margin:0; padding-left:18px;\">" + "".join(lis) + "</ul>"
 
     def _card(a: dict) -> str:
@@ -98,14 +140,18 @@ def _render_summary_html(items: list[tuple[object, str]], folder: str) -> str:
             return None
 
     def _looks_like_html(s: str) -> bool:
+        # 不做 strip 拷贝：跳过前导空白看首字符，再各做一次 find
         if not s:
             return False
-        s = s.strip()
-        return s.startswith('<') and ('</' in s or '/>' in s)
+        i = 0
+        n = len(s)
+        while i < n and s[i] in ' \t\r\n':
+            i += 1
+        return i < n and s[i] == '<' and (s.find('</', i + 1) != -1 or s.find('/>', i + 1) != -1)
 
     cards = []
     for m, summ in items:
-        subj = decode_subject(m)
+        subj = decode_subject(m).translate(_HTML_ESCAPE)
         body = (summ if _looks_like_html(summ) else _bullets(summ)) if summ else "<div style=\"color:#888;\">(empty)</div>"
         cards.append(
             f"""
@@ -130,29 +176,35 @@ def _render_summary_html(items: list[tuple[object, str]], folder: str) -> str:
       </body>
     </html>
     """
-    return inline_css(html)
+    # 模板本身已全部用内联 style= 编写，没有 <style> 块需要下沉；
+    # premailer（cssutils 解析 + lxml 重建）默认跳过，需要时用配置打开
+    return inline_css(html) if inline_css_enabled else html
 
 
 from .imap_client import (
     connect,
+    lease_imap,
+    release_imap,
     list_unseen,
     search_unseen_without_prefix,
     fetch_raw,
+    fetch_raw_bulk,
+    list_headers,
     parse_message,
     pick_html_or_text,
     build_email,
     append_unseen,
     mark_seen,
+    mark_seen_bulk,
     mark_unseen,
     move_to_junk,
     has_linked_reply,
 )
-from .utils import decode_subject, pass_prefix, split_by_chars, rough_token_count
+from .utils import decode_subject, load_prompt, pass_prefix, split_by_chars, rough_token_count
+from .tm import TM, norm_hash
 from .mock_llm import summarize_mock, translate_batch_mock
 from .immersion import (
-    inject_bilingual_html,
-    inject_bilingual_html_conservative,
-    inject_bilingual_html_linewise,
+    inject_bilingual_html_two_pass,
     translate_html_inplace,
 )
 
@@ -176,7 +228,7 @@ def _extract_plain_for_summary(html: str | None, txt: str | None) -> str:
 
     if html:
         try:
-            soup = BeautifulSoup(html, "html5lib")
+            soup = BeautifulSoup(html, "lxml")
             for tag in soup(["style", "script", "noscript", "head", "title", "meta", "link"]):
                 try:
                     tag.decompose()
@@ -480,6 +532,15 @@ def new_openai(
     has_headers = bool(safe_headers)
     logger.info(f"初始化 LLM 客户端: base={base}, auth_header={auth_header}, headers={has_headers}")
 
+    # 同一任务的所有分段/文件夹共享一个 keepalive 连接池，避免每次调用重新做
+    # TCP + TLS 握手；开启 HTTP/2 以便并发请求复用同一条连接。
+    limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    try:
+        http_client = httpx.Client(limits=limits, http2=True, timeout=timeout)
+    except ImportError:
+        # http2 需要 h2 包；缺失时退回 HTTP/1.1 keepalive 连接池
+        http_client = httpx.Client(limits=limits, timeout=timeout)
+
     # OpenAI Python SDK 默认会携带 Authorization: Bearer <api_key>。
     # 这里通过 default_headers 透传自定义头（如 User-Agent）以兼容被上游风控拦截的场景。
     return OpenAI(
@@ -487,6 +548,7 @@ def new_openai(
         api_key=api_key,
         timeout=timeout,
         default_headers=safe_headers,
+        http_client=http_client,
     )
 
 
@@ -691,25 +753,32 @@ def _dump_obj(obj) -> dict:
 def _capture_usage_meta(meta: dict, usage) -> None:
     if usage is None:
         return
-    u = _dump_obj(usage)
-    if not isinstance(u, dict) or not u:
-        return
-    meta["usage"] = u
+    # 直接属性访问即可拿到需要的 2-3 个字段；model_dump 的递归 pydantic
+    # 遍历在每个 chunk 上都会被调用，纯属浪费。
+    if isinstance(usage, dict):
+        getter = usage.get
+    else:
+        def getter(key, default=None):
+            return getattr(usage, key, default)
+    u: dict = {}
     for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
-        val = u.get(key)
+        val = getter(key)
         if val is not None:
             try:
                 meta[key] = int(val)
             except Exception:
                 meta[key] = val
-    ctd = u.get("completion_tokens_details") or {}
-    if isinstance(ctd, dict):
-        rt = ctd.get("reasoning_tokens")
+            u[key] = meta[key]
+    ctd = getter("completion_tokens_details")
+    if ctd is not None:
+        rt = ctd.get("reasoning_tokens") if isinstance(ctd, dict) else getattr(ctd, "reasoning_tokens", None)
         if rt is not None:
             try:
                 meta["reasoning_tokens"] = int(rt)
             except Exception:
                 meta["reasoning_tokens"] = rt
+    if u:
+        meta["usage"] = u
 
 
 def preflight_check_llm(cfg: dict) -> bool:
@@ -944,12 +1013,21 @@ def deepseek_summarize(
         content = (getattr(msg, "content", None) or "")
 
         # best-effort extract provider-specific thinking / reasoning output
+        # （直接属性访问，跳过 model_dump 的全字段遍历）
         thinking = ""
-        try:
-            d = _dump_obj(msg)
-            thinking = _extract_reasoning_chunk(d)
-        except Exception:
-            thinking = ""
+        for key in (
+            "reasoning_content",
+            "reasoningContent",
+            "reasoning",
+            "thought",
+            "thoughts",
+            "thinking",
+            "analysis",
+        ):
+            chunk = _extract_text_like(getattr(msg, key, None))
+            if chunk:
+                thinking = chunk
+                break
 
         # capture provider usage / reasoning token stats when available
         try:
@@ -1040,7 +1118,7 @@ def summarize_job(cfg: dict):
         )
 
     prompt_path = Path(task.get('prompt_file') or 'Prompt.txt')
-    prompt = prompt_path.read_text(encoding='utf-8') if prompt_path.exists() else '请用中文进行总结，并给出结构化要点。'
+    prompt = load_prompt(prompt_path, '请用中文进行总结，并给出结构化要点。')
 
     folders = sum_cfg.get('folders', DEFAULT_SUMMARY_FOLDERS)
     inbox_keywords = [
@@ -1068,12 +1146,49 @@ def summarize_job(cfg: dict):
     batch_size = int(sum_cfg.get('batch_size', 10))
     chunk_chars = int(sum_cfg.get('chunk_tokens', 16000))  # approx by chars
 
-    c = connect(imap['server'], imap['email'], imap['password'], port=imap.get('port',993), ssl=imap.get('ssl',True))
+    c = lease_imap(imap['server'], imap['email'], imap['password'], port=imap.get('port',993), ssl=imap.get('ssl',True))
+
+    # 启动时并发构建“文件夹 -> 未读 UID”索引：每个文件夹的 SEARCH/FETCH 枚举
+    # 相互独立，用一个小连接池把服务端延迟重叠起来，主循环直接查表。
+    fetch_chunk = int(sum_cfg.get('unseen_fetch_chunk', 500))
+    scan_folders = [str(p.get('folder') or 'INBOX') for p in scan_plans]
+    folder_uids: dict[str, list[int]] = {}
+    pool: list = []
+    if len(scan_folders) > 1:
+        try:
+            # 辅助连接也走共享缓存：下次任务直接复用，免去整套 TLS+LOGIN
+            pool = [
+                lease_imap(imap['server'], imap['email'], imap['password'], port=imap.get('port', 993), ssl=imap.get('ssl', True))
+                for _ in range(min(len(scan_folders), 4))
+            ]
+        except Exception as e:
+            logger.info(f"未读索引连接池创建失败，回退为逐文件夹枚举: {e}")
+            pool = []
+    if pool:
+        from concurrent.futures import ThreadPoolExecutor
+
+        def _enumerate_on(conn, part: list[str]) -> dict[str, list[int]]:
+            # 每个线程独占一条 IMAP 连接，串行处理分到的文件夹
+            out: dict[str, list[int]] = {}
+            for f in part:
+                try:
+                    out[f] = search_unseen_without_prefix(conn, f, exclude_auto_generated=True, robust=True, fetch_chunk=fetch_chunk)
+                except Exception as e:
+                    logger.info(f"并发枚举未读失败，该文件夹将回退串行: {f} ({e})")
+            return out
+
+        parts = [scan_folders[i::len(pool)] for i in range(len(pool))]
+        with ThreadPoolExecutor(max_workers=len(pool)) as ex:
+            for res in ex.map(_enumerate_on, pool, parts):
+                folder_uids.update(res)
+
     submitted_entries: list[dict] = []
+    # 热循环里反复的属性查找在 CPython 有可观开销，绑定为局部名
+    _append_entry = submitted_entries.append
     # create a run file early with meta for visibility
     _run_start = datetime.now()
     _run_ts = _run_start.strftime('%Y%m%d-%H%M%S')
-    _run_path = (_DATA_DIR / f'summarize-{_run_ts}.json') if save_summary_json else None
+    _run_path = (_DATA_DIR / f'summarize-{_run_ts}.jsonl') if save_summary_json else None
     _meta = {
         'mode': 'job',
         'folders': folders,
@@ -1089,11 +1204,8 @@ def summarize_job(cfg: dict):
         'run_id': _run_ts,
         'entries_written': 0,
     }
-    def _maybe_save(entries: list[dict]):
-        if save_summary_json and _run_path:
-            _save_summary_payload(entries, path=_run_path, meta=_meta)
-
-    _maybe_save([])
+    _run_log = _SummaryRunLog(_run_path)
+    _run_log.save_meta(_meta)
     try:
         for plan in scan_plans:
             folder = str(plan.get('folder') or 'INBOX')
@@ -1106,8 +1218,16 @@ def summarize_job(cfg: dict):
                 logger.info(f"扫描总结文件夹: {folder}")
 
             # robust unseen enumeration to avoid server SEARCH limits
-            fetch_chunk = int(sum_cfg.get('unseen_fetch_chunk', 500))
-            uids = search_unseen_without_prefix(c, folder, exclude_auto_generated=True, robust=True, fetch_chunk=fetch_chunk)
+            # （优先使用启动时并发构建的索引，缺失时回退为串行枚举）
+            # 索引按文件夹一次性消费：同一文件夹出现在多个扫描计划时，
+            # 后续计划改走实时枚举，避免吃到本轮已标记已读的过期 UID
+            prebuilt = folder_uids.pop(folder, None)
+            if prebuilt is not None:
+                uids = prebuilt
+                # 枚举发生在池连接上，主连接仍需选中当前文件夹供后续 FETCH/STORE
+                c.select_folder(folder)
+            else:
+                uids = search_unseen_without_prefix(c, folder, exclude_auto_generated=True, robust=True, fetch_chunk=fetch_chunk)
             logger.info(f"找到未读邮件（已排除自动通知），数量={len(uids)}")
             # Optional cap per folder
             cfg_sum = sum_cfg
@@ -1117,8 +1237,23 @@ def summarize_job(cfg: dict):
                 uids = uids[-max_per:] if order == 'newest' else uids[:max_per]
                 logger.info(f"命中数量超过每个文件夹上限，按 {order} 方向截断到 {len(uids)} 封")
             pairs = []
+            # 先只拉 Subject 头做前缀/关键字过滤，正文只为幸存者批量传输；
+            # 高延迟服务器上几百封未读从逐封 RTT 降到个位数往返
+            hdrs = list_headers(c, uids)
+            survivors = []
             for uid in uids:
-                raw = fetch_raw(c, uid)
+                hdr = hdrs.get(uid)
+                if hdr is None:
+                    # 头部批量拉取缺失时保底进入全文阶段再判一次
+                    survivors.append(uid)
+                    continue
+                sub = decode_subject(hdr)
+                if not pass_prefix(sub, excluded):
+                    continue
+                if scan_mode == 'inbox_keyword' and not any(k in sub for k in inbox_keywords):
+                    continue
+                survivors.append(uid)
+            for uid, raw in fetch_raw_bulk(c, survivors):
                 msg = parse_message(raw)
                 sub = decode_subject(msg)
                 if not pass_prefix(sub, excluded):
@@ -1140,7 +1275,11 @@ def summarize_job(cfg: dict):
                         logger.info(f"INBOX 关键字总结通道保留未读（空内容跳过）: {sub} (uid={uid})")
                     continue
                 total_chars = len(plain)
-                total_tokens = rough_token_count(plain)
+                # 该估算只用于下面的 INFO 日志；日志被关掉时用常数时间近似
+                if logger.isEnabledFor(logging.INFO):
+                    total_tokens = rough_token_count(plain)
+                else:
+                    total_tokens = len(plain) >> 2
                 chunks = split_by_chars(plain, chunk_chars)
                 logger.info(
                     f"总结规划: 原文字符数={total_chars}, 预估 tokens={total_tokens}, "
@@ -1150,6 +1289,8 @@ def summarize_job(cfg: dict):
                 aggregated_articles: list[dict] = []
                 summary_output_valid = True
                 invalid_reasons: list[str] = []
+                # 秒级时间戳对总结日志足够，按封计算一次而不是每个分段一次
+                msg_when = datetime.now().isoformat(timespec='seconds')
                 for idx, ch in enumerate(chunks):
                     c_chars = len(ch)
                     c_tokens = rough_token_count(ch)
@@ -1217,7 +1358,7 @@ def summarize_job(cfg: dict):
                         'thinking_budget': int(fallback_thinking_budget if used_fallback else thinking_budget),
                         'thinking': thinking,
                         'answer': summary,
-                        'when': datetime.now().isoformat(timespec='seconds'),
+                        'when': msg_when,
                         'mock': bool(use_mock),
                     }
                     # enrich with provider metadata when available (e.g. Gemini reasoning tokens)
@@ -1228,7 +1369,8 @@ def summarize_job(cfg: dict):
                         for key in ("prompt_tokens", "completion_tokens", "total_tokens", "reasoning_tokens", "completion_id"):
                             if key in meta_extra and meta_extra[key] is not None:
                                 entry[key] = meta_extra[key]
-                    submitted_entries.append(entry)
+                    _append_entry(entry)
+                    _run_log.append(entry)
 
                     # Normalize parsed output shape:
                     # - expected: {"articles": [...], "no_match_reason": "..."}
@@ -1323,30 +1465,48 @@ def summarize_job(cfg: dict):
                 batch = pairs[i:i+batch_size]
                 if not batch:
                     continue
-                html = _render_summary_html([(m, summ) for _, m, summ in batch], folder)
+                html = _render_summary_html(
+                    [(m, summ) for _, m, summ in batch],
+                    folder,
+                    inline_css_enabled=bool(sum_cfg.get('inline_css_enabled', False)),
+                )
                 folder_label = "INBOX关键词" if scan_mode == 'inbox_keyword' else folder
                 subject = f"{pref.get('summarize','[机器总结]')} {folder_label}（{len(batch)}封）"
                 out = build_email(subject, imap['email'], imap['email'], html, None)
                 append_unseen(c, folder, out)
                 logger.info(f"已写入总结邮件: {subject}")
                 if mark_seen_after_summary:
-                    for uid, _, _ in batch:
-                        mark_seen(c, folder, uid)
+                    # 一条多 UID STORE 代替逐封往返
+                    mark_seen_bulk(c, folder, [uid for uid, _, _ in batch])
                 else:
                     logger.info(f"INBOX 关键字总结通道保留原邮件未读: {len(batch)} 封")
-                # checkpoint after each batch
+                # checkpoint after each batch（entry 行已随写随刷，只需刷 meta）
                 _meta['entries_written'] = len(submitted_entries)
                 _meta['last_update'] = datetime.now().isoformat(timespec='seconds')
-                _maybe_save(submitted_entries)
+                _run_log.save_meta(_meta)
     finally:
         try:
-            c.logout()
+            release_imap(c, broken=sys.exc_info()[0] is not None)
         except Exception:
             pass
+        for conn in pool:
+            try:
+                release_imap(conn, broken=sys.exc_info()[0] is not None)
+            except Exception:
+                pass
+        # 释放 LLM 客户端持有的连接池（close 幂等，fallback 复用主客户端时重复调用无害）
+        for _cli in (cli, fallback_cli):
+            if _cli is None:
+                continue
+            try:
+                _cli.close()
+            except Exception:
+                pass
     # finalize payloads for this run
     _meta['entries_written'] = len(submitted_entries)
     _meta['end_time'] = datetime.now().isoformat(timespec='seconds')
-    _maybe_save(submitted_entries)
+    _run_log.save_meta(_meta)
+    _run_log.close()
 
 
 # --- Translation (ported minimal from imapTLDR2) ---
@@ -1365,7 +1525,7 @@ def _fix_repeated_inplace_spans(html: str) -> str:
     if not html:
         return html
     try:
-        soup = BeautifulSoup(html, 'html5lib')
+        soup = BeautifulSoup(html, 'lxml')
     except Exception:
         return html
 
@@ -1427,6 +1587,21 @@ def _fix_repeated_inplace_spans(html: str) -> str:
     except Exception:
         return html
 
+def _estimate_llm_tokens(text: str) -> int:
+    """Per-segment token estimate for rate-limit accounting, incl. prompt overhead.
+
+    CJK 文本约 1 token/2-3 字节，拉丁文约 4 字符/token；只探测前 64 个字符
+    判断文种，避免为一个限流估算扫描整段文本。
+    """
+    if not text:
+        return 64
+    if any(ord(ch) > 0x3000 for ch in text[:64]):
+        est = len(text.encode('utf-8')) // 3
+    else:
+        est = len(text) >> 2
+    return max(1, est) + 64
+
+
 def qwen_translate_batch(cli: OpenAI, model: str, segments: list[str], timeout: float | int = 15.0) -> list[str]:
     if not segments:
         return []
@@ -1475,6 +1650,53 @@ def qwen_translate_single(cli: OpenAI, model: str, text: str, timeout: float | i
         return ''
 
 
+_GROUP_MARK_RE = re.compile(r"<<<\s*(\d+)\s*>>>")
+# 空白折叠用预编译正则：_norm 在每封邮件的每个分段上会被反复调用
+_WS_RE = re.compile(r"\s+")
+
+
+def qwen_translate_group(cli: OpenAI, model: str, segments: list[str], timeout: float | int = 300.0) -> list[str]:
+    """Translate several segments with one chat request using indexed markers.
+
+    每段用 <<<i>>> 编号包裹，应答按显式编号解析回填——乱序或丢段只会让
+    对应位置留空，由调用方的重试/兜底机制逐段修复，不会造成错位。
+    """
+    if not segments:
+        return []
+    if len(segments) == 1:
+        return [qwen_translate_single(cli, model, segments[0], timeout=timeout)]
+    system_prompt = (
+        "You are a translation expert. Translate each numbered segment between "
+        "<<<i>>> markers into simple Chinese. Reply with the same <<<i>>> markers, "
+        "each immediately followed by only that segment's translation. Keep numbers, "
+        "proper nouns and punctuation; never merge, drop or reorder segments; "
+        "no explanations."
+    )
+    user_prompt = "\n".join(f"<<<{i + 1}>>>\n{s}" for i, s in enumerate(segments))
+    try:
+        r = cli.chat.completions.create(
+            model=model,
+            temperature=0.0,
+            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+            timeout=timeout,
+        )
+        text = r.choices[0].message.content or ''
+    except Exception as e:
+        logger.info(f"LLM 批量翻译出错或超时: {e}")
+        return [''] * len(segments)
+    outs = [''] * len(segments)
+    parts = _GROUP_MARK_RE.split(text)
+    # parts = [prefix, idx1, body1, idx2, body2, ...]
+    for j in range(1, len(parts) - 1, 2):
+        try:
+            i = int(parts[j]) - 1
+        except Exception:
+            continue
+        if 0 <= i < len(segments):
+            outs[i] = (parts[j + 1] or '').strip()
+    return outs
+
+
 def _deeplx_endpoint(api_base: str) -> str:
     base = (api_base or "").strip()
     if not base:
@@ -1559,48 +1781,146 @@ def deeplx_translate_single(
 
 
 def scan_translate_targets(c, cfg: dict, excluded_prefixes: Iterable[str]):
+    import queue as _queue
+    import threading as _th
+
     translate_cfg = cfg.get('translate', {})
     folders = translate_cfg.get('folders', DEFAULT_TRANSLATE_FOLDERS)
     max_per = int(translate_cfg.get('max_per_run_per_folder', 3))
+    inbox_keywords = translate_cfg.get('inbox_keywords', ["相关研究汇总","快讯汇总"])  # defaults
+    inbox_froms = translate_cfg.get('inbox_from', ["scholaralerts-noreply@google.com"])
+    excluded_prefixes = list(excluded_prefixes)
 
-    # normal folders
-    for folder in folders:
+    def _folder_channel(conn, folder):
         # QQ 邮箱其他文件夹通常以“其他文件夹/xxx”，保持与 summarize 同一前缀
         target_folder = folder if (folder.startswith('INBOX') or '/' in folder) else f"其他文件夹/{folder}"
         try:
             logger.info(f"扫描翻译文件夹: {target_folder}")
-            uids = list_unseen(c, target_folder)
+            uids = list_unseen(conn, target_folder)
         except Exception as e:
             logger.info(f"跳过文件夹（不存在或无法访问）: {target_folder} ({e})")
-            continue
-        count = 0
+            return
+        # 先只拉头部做前缀过滤，再批量拉取幸存者的正文：
+        # 被丢弃的邮件从头到尾都不会传输正文字节
+        hdrs = list_headers(conn, uids)
+        survivors: list[int] = []
         for uid in uids:
-            raw = fetch_raw(c, uid)
+            hdr = hdrs.get(uid)
+            if hdr is None:
+                # 头部拉取失败时保守地保留，正文阶段会再过滤一次
+                survivors.append(uid)
+            else:
+                if not pass_prefix(decode_subject(hdr), excluded_prefixes):
+                    continue
+                survivors.append(uid)
+            if len(survivors) >= max_per:
+                break
+        # 批量 FETCH：一条多 UID 命令代替逐封往返，高延迟服务器上差距巨大
+        for uid, raw in fetch_raw_bulk(conn, survivors):
             msg = parse_message(raw)
             sub = decode_subject(msg)
             if not pass_prefix(sub, excluded_prefixes):
                 continue
             logger.info(f"待翻译邮件: {sub} (uid={uid})")
             yield (target_folder, uid, msg)
-            count += 1
-            if count >= max_per:
+
+    def _inbox_channel(conn):
+        uids = list_unseen(conn, 'INBOX')
+        logger.info("扫描 INBOX 关键字通道")
+        # 关键字/发件人规则在头部上即可判定，正文只为命中的邮件传输
+        hdrs = list_headers(conn, uids)
+        survivors = []
+        for uid in uids:
+            hdr = hdrs.get(uid)
+            if hdr is None:
+                survivors.append(uid)
+                continue
+            sub = decode_subject(hdr)
+            if not pass_prefix(sub, excluded_prefixes):
+                continue
+            sender = str(hdr.get('From', ''))
+            if any(k in sub for k in inbox_keywords) or any(f in sender for f in inbox_froms):
+                survivors.append(uid)
+        for uid, raw in fetch_raw_bulk(conn, survivors):
+            msg = parse_message(raw)
+            sub = decode_subject(msg)
+            if not pass_prefix(sub, excluded_prefixes):
+                continue
+            sender = str(msg.get('From', ''))
+            if any(k in sub for k in inbox_keywords) or any(f in sender for f in inbox_froms):
+                logger.info(f"INBOX 关键字命中: {sub} (from={sender}, uid={uid})")
+                yield ('INBOX', uid, msg)
+
+    # 每个通道 = 一个文件夹（或 INBOX 关键字规则）；通道之间没有共享状态，
+    # 可以分摊到多条独立连接上并行扫描（imaplib 单连接不可多线程复用）。
+    channels = [('folder', f) for f in folders]
+    channels.append(('inbox', None))
+
+    def _run_channel(conn, kind, f):
+        return _folder_channel(conn, f) if kind == 'folder' else _inbox_channel(conn)
+
+    pool = []
+    if len(channels) > 1:
+        imap_cfg = cfg.get('imap', {})
+        for _ in range(min(4, len(channels))):
+            try:
+                # 从共享缓存取辅助连接，跨任务周期保持热连接
+                pool.append(lease_imap(
+                    imap_cfg['server'], imap_cfg['email'], imap_cfg['password'],
+                    port=imap_cfg.get('port', 993), ssl=imap_cfg.get('ssl', True),
+                ))
+            except Exception as e:
+                logger.info(f"翻译扫描并行连接建立失败，剩余通道退回主连接串行扫描: {e}")
                 break
 
-    # INBOX keyword channel
-    inbox_keywords = translate_cfg.get('inbox_keywords', ["相关研究汇总","快讯汇总"])  # defaults
-    inbox_froms = translate_cfg.get('inbox_from', ["scholaralerts-noreply@google.com"]) 
-    uids = list_unseen(c, 'INBOX')
-    logger.info("扫描 INBOX 关键字通道")
-    for uid in uids:
-        raw = fetch_raw(c, uid)
-        msg = parse_message(raw)
-        sub = decode_subject(msg)
-        if not pass_prefix(sub, excluded_prefixes):
-            continue
-        sender = str(msg.get('From', ''))
-        if any(k in sub for k in inbox_keywords) or any(f in sender for f in inbox_froms):
-            logger.info(f"INBOX 关键字命中: {sub} (from={sender}, uid={uid})")
-            yield ('INBOX', uid, msg)
+    if not pool:
+        for kind, f in channels:
+            yield from _run_channel(c, kind, f)
+        return
+
+    # 生产者线程各自独占一条连接扫描分到的通道，主线程边消费边翻译，
+    # 让后续文件夹的 FETCH 延迟与 LLM 调用重叠
+    q: _queue.Queue = _queue.Queue(maxsize=32)
+
+    def _worker(conn, parts):
+        try:
+            for kind, f in parts:
+                try:
+                    for item in _run_channel(conn, kind, f):
+                        q.put(item)
+                except Exception as e:
+                    logger.info(f"扫描通道失败: {f or 'INBOX'} ({e})")
+        finally:
+            q.put(None)
+
+    threads = []
+    for i, conn in enumerate(pool):
+        t = _th.Thread(target=_worker, args=(conn, channels[i::len(pool)]), daemon=True)
+        t.start()
+        threads.append(t)
+    try:
+        done = 0
+        while done < len(pool):
+            item = q.get()
+            if item is None:
+                done += 1
+                continue
+            yield item
+    finally:
+        # 消费方提前退出时生产者可能还阻塞在 q.put 上：先把队列抽干，
+        # 让线程得以跑到各自的哨兵退出
+        try:
+            while not q.empty():
+                q.get_nowait()
+        except Exception:
+            pass
+        for t, conn in zip(threads, pool):
+            t.join(timeout=5)
+            try:
+                # 超时未退出的线程仍持有该连接，按损坏处理关闭而不是回缓存
+                release_imap(conn, broken=t.is_alive())
+            except Exception:
+                pass
 
 
 def translate_job(cfg: dict):
@@ -1683,6 +2003,13 @@ def translate_job(cfg: dict):
             f"机器翻译 LLM 配置: 主模型={trans_model or '(n/a)'}, 提供商={main_task['provider']}, "
             f"兜底模型={fallback_model or '(none)'}"
         )
+
+        # 预热连接池：提前完成 TCP+TLS 握手，首个翻译请求不付冷启动延迟
+        for warm_cli in {id(x): x for x in (cli, fallback_cli) if x is not None}.values():
+            try:
+                warm_cli.with_options(timeout=5.0).models.list()
+            except Exception:
+                pass
     else:
         cli = None
         fallback_cli = None  # type: ignore[assignment]
@@ -1698,35 +2025,50 @@ def translate_job(cfg: dict):
         import threading as _th
         from concurrent.futures import ThreadPoolExecutor, as_completed
 
-        class TokenBucket:
-            def __init__(self, capacity: float, refill_per_sec: float):
-                self.capacity = float(max(1.0, capacity))
-                self.refill = float(max(0.01, refill_per_sec))
-                self.tokens = float(capacity)
-                self.ts = _t.monotonic()
+        class DeadlineLimiter:
+            """把 RPM / TPM 两个限流桶合并为一个“下次可发时刻”门闸。
+
+            reserve 在一把锁内同时推进请求与 token 两条时间线，返回本次
+            请求的准入时刻；调用方只睡一次。取代原先两个 TokenBucket 连续
+            acquire 带来的两次独立等待与唤醒。
+            """
+
+            def __init__(self, rpm: float, tpm: float):
+                self.req_interval = 60.0 / max(1.0, float(rpm))
+                self.tok_rate = max(1.0, float(tpm)) / 60.0
+                self.req_next = _t.monotonic()
+                self.tok_next = self.req_next
                 self.lock = _th.Lock()
 
-            def acquire(self, amount: float):
-                amount = float(max(0.0, amount))
-                while True:
-                    with self.lock:
-                        now = _t.monotonic()
-                        elapsed = now - self.ts
-                        if elapsed > 0:
-                            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill)
-                            self.ts = now
-                        if self.tokens >= amount:
-                            self.tokens -= amount
-                            return
-                        need = (amount - self.tokens) / self.refill
-                    _t.sleep(min(0.25, max(need, 0.02)))
-
-        req_bucket = TokenBucket(capacity=float(rpm_limit), refill_per_sec=float(rpm_limit) / 60.0)
-        tok_bucket = TokenBucket(capacity=float(tpm_limit), refill_per_sec=float(tpm_limit) / 60.0)
+            def reserve(self, est_tokens: float = 0.0) -> float:
+                est = float(max(0.0, est_tokens))
+                with self.lock:
+                    now = _t.monotonic()
+                    at = max(now, self.req_next, self.tok_next)
+                    self.req_next = at + self.req_interval
+                    self.tok_next = at + est / self.tok_rate
+                return at
+
+            def wait(self, est_tokens: float = 0.0):
+                delay = self.reserve(est_tokens) - _t.monotonic()
+                if delay > 0:
+                    _t.sleep(delay)
+
+        limiter = DeadlineLimiter(rpm_limit, tpm_limit)
+
+        # 同一段文本在重试/兜底间反复估算 token 数，缓存一次的结果即可
+        est_cache: dict[str, int] = {}
+
+        def _est_tokens(seg: str) -> int:
+            est = est_cache.get(seg)
+            if est is None:
+                est = _estimate_llm_tokens(seg)
+                est_cache[seg] = est
+            return est
 
         def do_one(idx: int, seg: str) -> tuple[int, str]:
-            req_bucket.acquire(1.0)
             if main_provider == "deeplx":
+                limiter.wait(0.0)
                 out = deeplx_translate_single(
                     deeplx_api_base,
                     deeplx_api_key,
@@ -1737,39 +2079,101 @@ def translate_job(cfg: dict):
                 )
                 return idx, out
             # estimate tokens (rough) for limit accounting
-            try:
-                est_tokens = max(1, int(rough_token_count(seg) + 64))
-            except Exception:
-                est_tokens = 128
-            tok_bucket.acquire(float(est_tokens))
+            limiter.wait(float(_est_tokens(seg)))
             out = qwen_translate_single(cli, trans_model, seg, timeout=translate_timeout)
             return idx, out
 
+        # 每个分组一个请求的上限：条数与估算 token 预算二者先到为准
+        group_size = max(1, int(tcfg.get('batch_group_size', 16)))
+        GROUP_TOKEN_BUDGET = 2000
+
+        def do_group(idxs: list[int], segs: list[str]) -> tuple[list[int], list[str]]:
+            limiter.wait(float(sum(_est_tokens(s) for s in segs)))
+            return idxs, qwen_translate_group(cli, trans_model, segs, timeout=translate_timeout)
+
         def _base_translator(batch: list[str]) -> list[str]:
             if not batch:
                 return []
             outs = [''] * len(batch)
+            if main_provider == "deeplx":
+                # DeepLX 没有批量协议，维持逐段并发
+                with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                    futures = [ex.submit(do_one, i, x) for i, x in enumerate(batch)]
+                    for fut in as_completed(futures):
+                        try:
+                            i, res = fut.result()
+                            outs[i] = (res or '').strip()
+                        except Exception as e:
+                            # fill empty on failure for this segment
+                            logger.info(f"翻译子任务失败，将填充为空字符串: {e}")
+                return outs
+
+            # 短段逐条发 HTTP 的话，每条都要付一次请求 + prompt 前缀开销；
+            # 切成分组后每组一个请求，限流按组整体扣减
+            groups: list[tuple[list[int], list[str]]] = []
+            cur_idx: list[int] = []
+            cur_seg: list[str] = []
+            cur_tok = 0
+            for i, seg in enumerate(batch):
+                t = _est_tokens(seg)
+                if cur_idx and (len(cur_idx) >= group_size or cur_tok + t > GROUP_TOKEN_BUDGET):
+                    groups.append((cur_idx, cur_seg))
+                    cur_idx, cur_seg, cur_tok = [], [], 0
+                cur_idx.append(i)
+                cur_seg.append(seg)
+                cur_tok += t
+            if cur_idx:
+                groups.append((cur_idx, cur_seg))
+
             with ThreadPoolExecutor(max_workers=max_workers) as ex:
-                futures = [ex.submit(do_one, i, x) for i, x in enumerate(batch)]
+                futures = [ex.submit(do_group, gi, gs) for gi, gs in groups]
                 for fut in as_completed(futures):
                     try:
-                        i, res = fut.result()
-                        outs[i] = (res or '').strip()
+                        gi, res = fut.result()
                     except Exception as e:
-                        # fill empty on failure for this segment
-                        logger.info(f"翻译子任务失败，将填充为空字符串: {e}")
+                        logger.info(f"翻译分组任务失败，将填充为空字符串: {e}")
+                        continue
+                    for i, tr in zip(gi, res or []):
+                        outs[i] = (tr or '').strip()
             return outs
 
+    def _norm_key(s: str) -> str:
+        try:
+            return " ".join((s or '').split())
+        except Exception:
+            return (s or '').strip()
+
+    # 跨运行翻译记忆（SQLite）：同一模型 + 相同源文直接复用历史译文
+    tm = TM() if (not use_mock and bool(tcfg.get('translation_memory', True))) else None
+
     def translator(batch: list[str]) -> list[str]:
         if not batch:
             return []
-        pending = list(range(len(batch)))
+        # pending 用集合：分发结果时就地 discard 成功的下标，
+        # 免去每轮重试后对整批再做一次 _looks_translated 扫描
+        pending: set[int] = set(range(len(batch)))
         outs = [''] * len(batch)
+        if tm is not None:
+            for idx in range(len(batch)):
+                src = batch[idx]
+                cached = tm.get(trans_model, norm_hash(src)) if src else None
+                if cached is not None and _looks_translated(src, cached):
+                    outs[idx] = cached
+                    pending.discard(idx)
         attempt = 0
         # 先使用主翻译模型进行多轮重试
         while pending and attempt < max_translate_attempts:
             attempt += 1
-            sub_batch = [batch[i] for i in pending]
+            # 每轮重试内按归一化文本去重：相同源文只远程调用一次，结果回填到所有位置
+            key_order: list[str] = []
+            key_to_idxs: dict[str, list[int]] = {}
+            for i in sorted(pending):
+                k = _norm_key(batch[i]) or f"\x00idx:{i}"
+                if k not in key_to_idxs:
+                    key_to_idxs[k] = []
+                    key_order.append(k)
+                key_to_idxs[k].append(i)
+            sub_batch = [batch[key_to_idxs[k][0]] for k in key_order]
             try:
                 results = _base_translator(sub_batch) or []
             except Exception as exc:
@@ -1778,9 +2182,12 @@ def translate_job(cfg: dict):
             if len(results) < len(sub_batch):
                 # pad to align indexes
                 results = (results + [''] * len(sub_batch))[:len(sub_batch)]
-            for idx, res in zip(pending, results):
-                outs[idx] = (res or '').strip()
-            pending = [idx for idx in pending if not _looks_translated(batch[idx], outs[idx])]
+            for k, res in zip(key_order, results):
+                tr = (res or '').strip()
+                for idx in key_to_idxs[k]:
+                    outs[idx] = tr
+                    if _looks_translated(batch[idx], tr):
+                        pending.discard(idx)
             if pending and attempt < max_translate_attempts:
                 logger.warning(
                     f"翻译重试 {attempt}/{max_translate_attempts}，剩余 {len(pending)} 个片段待处理"
@@ -1791,18 +2198,16 @@ def translate_job(cfg: dict):
             logger.warning(
                 f"翻译兜底: 使用兜底模型={fallback_model} 处理 {len(pending)} 个片段"
             )
-            for idx in list(pending):
-                src = batch[idx]
+            by_key: dict[str, list[int]] = {}
+            for idx in sorted(pending):
+                by_key.setdefault(_norm_key(batch[idx]) or f"\x00idx:{idx}", []).append(idx)
+            for idxs in by_key.values():
+                src = batch[idxs[0]]
                 if not src:
                     continue
                 # 兜底同样走简单的限流控制，避免压垮后端
                 try:
-                    est_tokens = max(1, int(rough_token_count(src) + 64))
-                except Exception:
-                    est_tokens = 128
-                try:
-                    req_bucket.acquire(1.0)
-                    tok_bucket.acquire(float(est_tokens))
+                    limiter.wait(float(_est_tokens(src)))
                 except Exception:
                     pass
                 try:
@@ -1813,20 +2218,53 @@ def translate_job(cfg: dict):
                 except Exception as exc:
                     logger.info(f"兜底翻译出错: {exc}")
                     tr = ''
-                outs[idx] = (tr or '').strip()
-            # 兜底后再检查一遍哪些段落仍然看起来“没有翻译成功”
-            pending = [idx for idx in pending if not _looks_translated(batch[idx], outs[idx])]
+                tr = (tr or '').strip()
+                for idx in idxs:
+                    outs[idx] = tr
+                    if _looks_translated(batch[idx], tr):
+                        pending.discard(idx)
 
         if pending:
             logger.warning(
                 f"翻译重试已耗尽（共 {max_translate_attempts} 次），"
                 f"仍有 {len(pending)} 个片段未完成（含兜底尝试）"
             )
+        if tm is not None:
+            for idx, src in enumerate(batch):
+                tr = outs[idx]
+                if src and tr and _looks_translated(src, tr):
+                    tm.put(trans_model, norm_hash(src), tr)
         return outs
 
-    c = connect(imap['server'], imap['email'], imap['password'], port=imap.get('port',993), ssl=imap.get('ssl',True))
+    c = lease_imap(imap['server'], imap['email'], imap['password'], port=imap.get('port',993), ssl=imap.get('ssl',True))
+
+    # 把逐封的 \Seen STORE 聚合为每个文件夹一条多 UID STORE（近似命令流水线的收益）。
+    # delete_translated 开启时仍即时标记，避免先被搬走的 UID 让批量 STORE 落空。
+    pending_seen: dict[str, list[int]] = {}
+
+    def _queue_seen(folder: str, uid: int):
+        if delete_translated:
+            mark_seen(c, folder, uid)
+        else:
+            pending_seen.setdefault(folder, []).append(uid)
+
+    def _flush_seen(folder: str | None = None):
+        keys = [folder] if folder is not None else list(pending_seen.keys())
+        for k in keys:
+            uids_ = pending_seen.pop(k, None)
+            if not uids_:
+                continue
+            try:
+                mark_seen_bulk(c, k, uids_)
+            except Exception as e:
+                logger.info(f"批量标记已读失败: {k} ({e})")
+
+    last_folder: str | None = None
     try:
         for folder, uid, msg in scan_translate_targets(c, cfg, excluded):
+            if last_folder is not None and folder != last_folder:
+                _flush_seen(last_folder)
+            last_folder = folder
             sub = decode_subject(msg)
             logger.info(f"处理翻译邮件: {sub} | 文件夹={folder} | uid={uid}")
             html, text = pick_html_or_text(msg)
@@ -1834,7 +2272,7 @@ def translate_job(cfg: dict):
                 html = f"<html><body><pre>{text}</pre></body></html>"
             if not html:
                 logger.info("跳过空内容邮件，标记为已读")
-                mark_seen(c, folder, uid)
+                _queue_seen(folder, uid)
                 continue
 
             # idempotency: skip if already handled（若未开启 force_retranslate）
@@ -1842,7 +2280,7 @@ def translate_job(cfg: dict):
             if not force_retranslate:
                 if orig_msgid and has_linked_reply(c, folder, orig_msgid, pref.get('translate','[机器翻译]')):
                     logger.info("跳过已翻译邮件（幂等检查）")
-                    mark_seen(c, folder, uid)
+                    _queue_seen(folder, uid)
                     if delete_translated:
                         try:
                             dst = move_to_junk(c, folder, uid)
@@ -1855,7 +2293,7 @@ def translate_job(cfg: dict):
             memo: dict[str, str] = {}
             def _norm(s: str) -> str:
                 try:
-                    return " ".join((s or '').split())
+                    return _WS_RE.sub(" ", s or '').strip()
                 except Exception:
                     return (s or '').strip()
 
@@ -1880,8 +2318,11 @@ def translate_job(cfg: dict):
                 key_to_out_indexes: dict[str, list[int]] = {}
                 key_to_req_index: dict[str, int] = {}
 
+                # 每个分段只归一化一次，后面两轮兜底循环直接复用
+                norms: list[str] = [_norm(seg) for seg in batch]
+
                 for i, seg in enumerate(batch):
-                    k = _norm(seg)
+                    k = norms[i]
                     if k and k in memo:
                         # 已有缓存，直接填充
                         outs[i] = memo[k]
@@ -1930,20 +2371,21 @@ def translate_job(cfg: dict):
 
                 # 再做一轮批内兜底：同一 key 只要有一处看起来翻译成功，就统一回填到该 key 的所有位置
                 best: dict[str, str] = {}
+                ok: list[bool] = [False] * len(batch)
                 for i, seg in enumerate(batch):
-                    k = _norm(seg)
+                    k = norms[i]
                     if not k:
                         continue
                     tr = (outs[i] or '').strip()
-                    if _looks_translated(seg, tr):
+                    ok[i] = _looks_translated(seg, tr)
+                    if ok[i]:
                         best.setdefault(k, tr)
                 if best:
                     for i, seg in enumerate(batch):
-                        k = _norm(seg)
+                        k = norms[i]
                         if not k or k not in best:
                             continue
-                        tr = (outs[i] or '').strip()
-                        if not _looks_translated(seg, tr):
+                        if not ok[i]:
                             outs[i] = best[k]
                             memo[k] = best[k]
 
@@ -1951,19 +2393,15 @@ def translate_job(cfg: dict):
 
             if inplace:
                 zh_html = translate_html_inplace(html, memo_translator)
-            elif strict_line:
-                zh_html = inject_bilingual_html_linewise(html, memo_translator)
-                zh_html = inject_bilingual_html_conservative(zh_html or html, memo_translator)
             else:
-                zh_html = inject_bilingual_html(html, memo_translator)
-                zh_html = inject_bilingual_html_conservative(zh_html or html, memo_translator)
+                zh_html = inject_bilingual_html_two_pass(html, memo_translator, linewise=strict_line)
             # 最后一层兜底：确保同封邮件内相同英文段落统一附带翻译 span
             zh_html = _fix_repeated_inplace_spans(zh_html)
             new_subject = f"{pref.get('translate','[机器翻译]')} {sub}"
             out = build_email(new_subject, imap['email'], imap['email'], zh_html, None, in_reply_to=msg.get('Message-ID'))
             target_folder = folder or 'INBOX'
             append_unseen(c, target_folder, out)
-            mark_seen(c, target_folder, uid)
+            _queue_seen(target_folder, uid)
             if delete_translated:
                 try:
                     dst = move_to_junk(c, target_folder, uid)
@@ -1973,6 +2411,20 @@ def translate_job(cfg: dict):
             logger.info(f"已写入翻译邮件: {new_subject}")
     finally:
         try:
-            c.logout()
+            _flush_seen()
         except Exception:
             pass
+        if tm is not None:
+            tm.close()
+        try:
+            release_imap(c, broken=sys.exc_info()[0] is not None)
+        except Exception:
+            pass
+        # 释放 LLM 客户端持有的连接池（close 幂等，fallback 复用主客户端时重复调用无害）
+        for _cli in (cli, fallback_cli):
+            if _cli is None:
+                continue
+            try:
+                _cli.close()
+            except Exception:
+                pass
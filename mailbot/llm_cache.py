@@ -0,0 +1,95 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("mailbot")
+
+_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = _ROOT / 'data' / 'llm_cache.sqlite3'
+# 命中场景主要是调试 / 对同一批 UID 重跑总结，响应不必长留，默认 7 天
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def request_key(prompt: str, snippet: str, model: str) -> bytes:
+    """Stable cache key: sha256 over the exact (prompt, snippet, model) triple."""
+    raw = "\x00".join((prompt or '', snippet or '', model or ''))
+    return hashlib.sha256(raw.encode('utf-8')).digest()
+
+
+class LLMCache:
+    """SQLite-backed cache of LLM summarize responses, shared across runs.
+
+    相同 (prompt, 正文片段, model) 的请求直接复用上次的应答，重跑时
+    LLM 花费归零。与 tm.TM 同一套退化约定：数据库不可用时所有操作都是
+    no-op，不影响主流程。
+    """
+
+    def __init__(self, path: Path | str | None = None, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl = int(ttl_seconds)
+        self.lock = threading.Lock()
+        self.conn: sqlite3.Connection | None = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache("
+                "h BLOB PRIMARY KEY, payload TEXT, ts INTEGER)"
+            )
+            conn.commit()
+            self.conn = conn
+        except Exception as e:
+            logger.info("LLM 响应缓存不可用，跳过持久缓存: %s", e)
+            self.conn = None
+
+    def get(self, key: bytes) -> dict | None:
+        if self.conn is None:
+            return None
+        with self.lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT payload, ts FROM llm_cache WHERE h=?", (key,)
+                ).fetchone()
+            except Exception:
+                return None
+        if not row:
+            return None
+        payload, ts = row
+        if self.ttl > 0 and (time.time() - (ts or 0)) > self.ttl:
+            return None
+        try:
+            value = json.loads(payload)
+        except Exception:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def put(self, key: bytes, value: dict):
+        if self.conn is None or not value:
+            return
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except Exception:
+            return
+        with self.lock:
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache(h, payload, ts) VALUES(?,?,?)",
+                    (key, payload, int(time.time())),
+                )
+                self.conn.commit()
+            except Exception:
+                pass
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
@@ -1,6 +1,9 @@
 from __future__ import annotations
+import re
 from typing import Iterable
 
+_SPLIT = re.compile(r"[。.!?\n]")
+
 
 def translate_batch_mock(segments: Iterable[str]) -> list[str]:
     out: list[str] = []
@@ -17,8 +20,18 @@ def summarize_mock(text: str, max_bullets: int = 5) -> str:
     t = (text or "").strip()
     if not t:
         return "(empty)"
-    # naive split by sentence enders
-    import re
-    parts = [p.strip() for p in re.split(r"[。.!?\n]", t) if p.strip()]
-    bullets = parts[:max_bullets]
+    # naive split by sentence enders; stop early once we have enough bullets
+    bullets: list[str] = []
+    pos = 0
+    for m in _SPLIT.finditer(t):
+        part = t[pos:m.start()].strip()
+        pos = m.end()
+        if part:
+            bullets.append(part)
+            if len(bullets) >= max_bullets:
+                break
+    else:
+        tail = t[pos:].strip()
+        if tail and len(bullets) < max_bullets:
+            bullets.append(tail)
     return "\n".join(f"- {b}" for b in bullets)
@@ -1,26 +1,54 @@
 from __future__ import annotations
+import asyncio
+import hashlib
+import json
 import logging
 import os
+import re
 import signal
-import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
 import sys
 import imaplib
 
-import pytz
-from apscheduler.schedulers.blocking import BlockingScheduler as BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.date import DateTrigger
-from apscheduler.events import EVENT_JOB_MISSED
+from zoneinfo import ZoneInfo
 
 from .config import load_config
-from .jobs import summarize_job, translate_job, preflight_check_llm
+
+# APScheduler 与 jobs（连带 openai/bs4 等重依赖）按需在 start_scheduler 里导入，
+# 让 `import mailbot.scheduler` 保持轻量（CLI --help / 子命令分发不用付这笔冷启动）
 
 
 logger = logging.getLogger("mailbot")
 
 
+@lru_cache(maxsize=128)
+def _parse_cron(spec: str, tzname: str) -> "CronTrigger":
+    """Parse a crontab spec once per (spec, tz); restarts/reloads reuse the trigger."""
+    from apscheduler.triggers.cron import CronTrigger
+    return CronTrigger.from_crontab(spec, timezone=ZoneInfo(tzname))
+
+_BASE_FMT = "%(asctime)s | mailbot | %(levelname)s | %(message)s"
+_DATE_FMT = "%Y-%m-%d %H:%M:%S"
+# 无色输出时格式器是无状态的，进程内复用同一个实例即可
+_PLAIN_FORMATTER = logging.Formatter(fmt=_BASE_FMT, datefmt=_DATE_FMT)
+# 高噪声第三方 logger 的名字前缀：压制到 WARNING，且不走彩色格式器
+_NOISY_LOGGERS = ("apscheduler", "httpx", "httpcore", "openai", "urllib3", "requests")
+
+
+# 中文生命周期标签，配合 ColorFormatter 在终端中高亮显示。
+# 标签与回退值从来都是同一个字符串，按 stdout 编码探测纯属死代码，
+# 直接用模块常量让 format 热路径的 LOAD_GLOBAL 命中内联缓存
+SYM_START = "开始"
+SYM_DONE = "完成"
+SYM_NEXT = "下次"
+SYM_WARN = "警告"
+SYM_FLAG = "标记"
+
+
 def _iter_exception_chain(exc: BaseException):
     seen = set()
     cur = exc
@@ -48,8 +76,8 @@ def _setup_logging():
     Key lifecycle messages (START / DONE / NEXT / WARN / FLAG) get
     icons and highlighted prefixes to make them easier to scan.
     """
-    base_fmt = "%(asctime)s | mailbot | %(levelname)s | %(message)s"
-    date_fmt = "%Y-%m-%d %H:%M:%S"
+    base_fmt = _BASE_FMT
+    date_fmt = _DATE_FMT
 
     # Best-effort color support; gracefully degrades if colorama is missing
     try:
@@ -68,42 +96,126 @@ def _setup_logging():
         def colorama_init():  # type: ignore
             return None
 
-    # Helper for safe ASCII symbols in non-UTF8 terminals
-    enc = (getattr(sys.stdout, "encoding", None) or "").lower()
-
-    def _safe(sym: str, fallback: str) -> str:
-        try:
-            if enc and "utf" in enc:
-                sym.encode(enc)
-                return sym
-        except Exception:
-            pass
-        return fallback
-
-    globals().update(
-        {
-            # 中文标签，配合 ColorFormatter 在终端中高亮显示
-            "SYM_START": _safe("开始", "开始"),
-            "SYM_DONE": _safe("完成", "完成"),
-            "SYM_NEXT": _safe("下次", "下次"),
-            "SYM_WARN": _safe("警告", "警告"),
-            "SYM_FLAG": _safe("标记", "标记"),
-        }
-    )
-
     # Decide whether to enable colored output (only for interactive terminals)
     colorama_init()
     use_color = bool(getattr(sys.stdout, "isatty", lambda: False)())
 
+    # ANSI 片段全是常量字符串，进函数时拼一次；format 热路径里
+    # 不再做 Fore.X + Style.BRIGHT 的属性查找和拼接
+    _RESET = Style.RESET_ALL
+    _CYAN = Fore.CYAN
+    _WHITE = Fore.WHITE
+    _RED = Fore.RED
+    _YELLOW = Fore.YELLOW
+    _GREEN = Fore.GREEN
+    _BLUE = Fore.BLUE
+    _CYAN_B = Fore.CYAN + Style.BRIGHT
+    _GREEN_B = Fore.GREEN + Style.BRIGHT
+    _BLUE_B = Fore.BLUE + Style.BRIGHT
+    _YELLOW_B = Fore.YELLOW + Style.BRIGHT
+    _MAGENTA_B = Fore.MAGENTA + Style.BRIGHT
+    _RED_B = Fore.RED + Style.BRIGHT
+
     class ColorFormatter(logging.Formatter):
         """Formatter that highlights level + lifecycle keywords."""
 
+        # 生命周期前缀与语义高亮的哨兵词。绝大多数日志行两者都不含，
+        # 命中不了任何分支，提前只给 levelname 上色即可返回，
+        # 省掉下面十几次线性扫描。哨兵集合覆盖所有语义分支的触发词。
+        _LIFECYCLE = ("START ", "DONE ", "NEXT ", "WARN ", "FLAG ")
+        _SENTINEL_RX = re.compile(
+            "数量=|耗时=|LLM 配置|LLM 预检|初始化 LLM 客户端"
+            "|扫描翻译文件夹|扫描总结文件夹|INBOX"
+            "|处理翻译邮件:|待翻译邮件:|待总结邮件:|跳过文件夹"
+            "|已写入翻译邮件|已写入总结邮件|已保存本次机器总结"
+            "|翻译重试|翻译兜底|总结规划:|分段 "
+        )
+
         def __init__(self, fmt: str, datefmt: str):
             super().__init__(fmt=fmt, datefmt=datefmt)
+            # levelno → 颜色前缀，免去每条记录走一遍阈值判断链
+            self._level_colors = {
+                logging.CRITICAL: _RED_B,
+                logging.ERROR: _RED,
+                logging.WARNING: _YELLOW,
+                logging.INFO: _GREEN,
+                logging.DEBUG: _BLUE,
+            }
+            # key=value 高亮统一走一张替换表 + 一次 sub，取代逐 key 的
+            # 线性 find 级联。交替分支按最长优先排列，避免「模型=」
+            # 抢先命中「主模型=」/「兜底模型=」的内部。
+            self._kv_rx = re.compile(
+                r"(主模型=|兜底模型=|思考 token 上限=|思考模式=|提供商=|模型="
+                r"|base=|文件夹=|uid=|provider=|model="
+                r"|原文字符数=|预估 tokens=|字符数=|数量=|耗时=)([^,\s)]*)"
+            )
+            self._kv_colors = {
+                "主模型=": _MAGENTA_B,
+                "模型=": _MAGENTA_B,
+                "兜底模型=": _CYAN,
+                "提供商=": _YELLOW,
+                "思考模式=": _CYAN,
+                "思考 token 上限=": _YELLOW,
+                "base=": _CYAN,
+                "文件夹=": _CYAN_B,
+                "uid=": _YELLOW,
+                "provider=": _YELLOW,
+                "model=": _MAGENTA_B,
+                "原文字符数=": _CYAN,
+                "预估 tokens=": _YELLOW,
+                "字符数=": _CYAN,
+                "耗时=": _MAGENTA_B,
+            }
+            # 同一秒内的突发日志共享一次 strftime 结果
+            self._last_sec = -1
+            self._last_time_str = ""
+
+        def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:  # type: ignore[override]
+            sec = int(record.created)
+            if sec == self._last_sec:
+                return self._last_time_str
+            s = time.strftime(datefmt or self.datefmt or "%Y-%m-%d %H:%M:%S", time.localtime(sec))
+            self._last_sec = sec
+            self._last_time_str = s
+            return s
+
+        def _kv_repl(self, mo: "re.Match[str]") -> str:
+            key = mo.group(1)
+            val = mo.group(2)
+            if key == "数量=":
+                # 数量只给数字上色：>0 用突出颜色，0 用弱色
+                c = _MAGENTA_B if val.isdigit() and int(val) > 0 else _WHITE
+                return key + c + val + _RESET
+            if key == "耗时=":
+                return key + self._kv_colors[key] + val + _RESET
+            return self._kv_colors[key] + mo.group(0) + _RESET
+
+        def _emit(self, record: logging.LogRecord, msg_for_display: str) -> str:
+            """按固定模板直接拼输出行，不往 record 上写回 levelname/msg。
+
+            基础格式是常量模板，没必要经由 super().format 的通用路径；
+            不改 record 也避免了同一条记录被多个 handler 并发格式化时
+            颜色串染到别的 handler。异常与 stack 信息按 Formatter 的
+            约定追加在消息之后。
+            """
+            level = f"{self._level_colors.get(record.levelno, _BLUE)}{record.levelname}{_RESET}"
+            out = "%s | mailbot | %s | %s" % (self.formatTime(record, self.datefmt), level, msg_for_display)
+            if record.exc_info and not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            if record.exc_text:
+                out = out + "\n" + record.exc_text
+            if record.stack_info:
+                out = out + "\n" + self.formatStack(record.stack_info)
+            return out
 
         def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
             # Decorate well-known lifecycle prefixes
             raw_msg = record.getMessage()
+
+            # 快速通道：既无生命周期前缀也不含任何哨兵词，只上级别色
+            if not raw_msg.startswith(self._LIFECYCLE) and not self._SENTINEL_RX.search(raw_msg):
+                return self._emit(record, raw_msg)
+
             prefix = ""
             rest = raw_msg
             prefix_color = ""
@@ -119,53 +231,28 @@ def _setup_logging():
 
             # Ordered by typical frequency
             if raw_msg.startswith("START "):
-                prefix, rest, prefix_color = _strip_prefix("START", SYM_START, Fore.CYAN + Style.BRIGHT)
+                prefix, rest, prefix_color = _strip_prefix("START", SYM_START, _CYAN_B)
             elif raw_msg.startswith("DONE "):
-                prefix, rest, prefix_color = _strip_prefix("DONE", SYM_DONE, Fore.GREEN + Style.BRIGHT)
+                prefix, rest, prefix_color = _strip_prefix("DONE", SYM_DONE, _GREEN_B)
             elif raw_msg.startswith("NEXT "):
-                prefix, rest, prefix_color = _strip_prefix("NEXT", SYM_NEXT, Fore.BLUE + Style.BRIGHT)
+                prefix, rest, prefix_color = _strip_prefix("NEXT", SYM_NEXT, _BLUE_B)
             elif raw_msg.startswith("WARN "):
-                prefix, rest, prefix_color = _strip_prefix("WARN", SYM_WARN, Fore.YELLOW + Style.BRIGHT)
+                prefix, rest, prefix_color = _strip_prefix("WARN", SYM_WARN, _YELLOW_B)
             elif raw_msg.startswith("FLAG "):
-                prefix, rest, prefix_color = _strip_prefix("FLAG", SYM_FLAG, Fore.MAGENTA + Style.BRIGHT)
+                prefix, rest, prefix_color = _strip_prefix("FLAG", SYM_FLAG, _MAGENTA_B)
 
             if prefix:
-                msg_for_display = f"{prefix_color}[{prefix}]{Style.RESET_ALL} {rest}"
+                msg_for_display = f"{prefix_color}[{prefix}]{_RESET} {rest}"
             else:
                 msg_for_display = raw_msg
 
             # --- Semantic highlighting for key fields (models, folders, counts, durations) ---
 
-            def _color_kv(message: str, key: str, color: str) -> str:
-                """高亮形如 key=value,... 的片段。"""
-                idx = message.find(key)
-                if idx == -1:
-                    return message
-                end = message.find(",", idx)
-                if end == -1:
-                    end = len(message)
-                return (
-                    message[:idx]
-                    + color
-                    + message[idx:end]
-                    + Style.RESET_ALL
-                    + message[end:]
-                )
-
             m = msg_for_display
 
-            # LLM 配置行：高亮模型名 / 提供商 / 思考配置
-            if "LLM 配置" in m:
-                m = _color_kv(m, "主模型=", Fore.MAGENTA + Style.BRIGHT)
-                m = _color_kv(m, "模型=", Fore.MAGENTA + Style.BRIGHT)
-                m = _color_kv(m, "兜底模型=", Fore.CYAN)
-                m = _color_kv(m, "提供商=", Fore.YELLOW)
-                m = _color_kv(m, "思考模式=", Fore.CYAN)
-                m = _color_kv(m, "思考 token 上限=", Fore.YELLOW)
-
-            # 初始化 LLM 客户端: base=...
-            if "初始化 LLM 客户端" in m:
-                m = _color_kv(m, "base=", Fore.CYAN)
+            # key=value 字段（模型 / 提供商 / 文件夹 / uid / 数量 / 耗时 等）
+            # 统一一次替换表扫描完成高亮
+            m = self._kv_rx.sub(self._kv_repl, m)
 
             # 扫描文件夹：高亮文件夹名称
             if m.startswith("扫描翻译文件夹: ") or m.startswith("扫描总结文件夹: "):
@@ -175,19 +262,11 @@ def _setup_logging():
                     folder = m[idx + len(marker) :]
                     m = (
                         m[: idx + len(marker)]
-                        + Fore.CYAN
-                        + Style.BRIGHT
+                        + _CYAN_B
                         + folder
-                        + Style.RESET_ALL
+                        + _RESET
                     )
 
-            # 处理翻译邮件: {sub} | 文件夹={folder} | uid={uid}
-            if "处理翻译邮件:" in m or "待翻译邮件:" in m or "待总结邮件:" in m:
-                # 高亮 文件夹= 后面的值
-                m = _color_kv(m, "文件夹=", Fore.CYAN + Style.BRIGHT)
-                # 高亮 uid= 后面的值
-                m = _color_kv(m, "uid=", Fore.YELLOW)
-
             # 跳过文件夹（不存在或无法访问）: {folder}
             if "跳过文件夹" in m and "不存在或无法访问" in m:
                 marker = "）: "
@@ -204,10 +283,9 @@ def _setup_logging():
                         remaining = ""
                     m = (
                         m[: idx + len(marker)]
-                        + Fore.CYAN
-                        + Style.BRIGHT
+                        + _CYAN_B
                         + folder
-                        + Style.RESET_ALL
+                        + _RESET
                         + remaining
                     )
 
@@ -219,17 +297,16 @@ def _setup_logging():
                     subject = m[idx + len(marker) :]
                     m = (
                         m[: idx + len(marker)]
-                        + Fore.GREEN
-                        + Style.BRIGHT
+                        + _GREEN_B
                         + subject
-                        + Style.RESET_ALL
+                        + _RESET
                     )
 
             # INBOX 通道相关
             if "扫描 INBOX 关键字通道" in m:
-                m = m.replace("INBOX", f"{Fore.CYAN}INBOX{Style.RESET_ALL}")
+                m = m.replace("INBOX", f"{_CYAN}INBOX{_RESET}")
             if "INBOX 关键字命中" in m:
-                m = m.replace("INBOX", f"{Fore.CYAN}INBOX{Style.RESET_ALL}")
+                m = m.replace("INBOX", f"{_CYAN}INBOX{_RESET}")
 
             # 总结 payload 保存路径
             if "已保存本次机器总结的请求与结果到文件:" in m:
@@ -244,51 +321,9 @@ def _setup_logging():
                         m = (
                             prefix_txt
                             + " "
-                            + Fore.MAGENTA
-                            + Style.BRIGHT
+                            + _MAGENTA_B
                             + path_txt
-                            + Style.RESET_ALL
-                        )
-
-            # 未读数量行：高亮数量，>0 用突出颜色，0 使用弱一点的颜色
-            if "数量=" in m:
-                key = "数量="
-                idx = m.find(key)
-                if idx != -1:
-                    start = idx + len(key)
-                    end = start
-                    while end < len(m) and m[end].isdigit():
-                        end += 1
-                    num_str = m[start:end]
-                    try:
-                        num = int(num_str)
-                    except Exception:
-                        num = None
-                    if num is not None:
-                        if num > 0:
-                            c = Fore.MAGENTA + Style.BRIGHT
-                        else:
-                            c = Fore.WHITE
-                        m = m[:start] + c + num_str + Style.RESET_ALL + m[end:]
-
-            # 耗时=9s 这类字段
-            if "耗时=" in m:
-                key = "耗时="
-                idx = m.find(key)
-                if idx != -1:
-                    start = idx + len(key)
-                    end = start
-                    while end < len(m) and (m[end].isdigit() or m[end].lower() == "s"):
-                        end += 1
-                    val = m[start:end]
-                    if val:
-                        m = (
-                            m[:start]
-                            + Fore.MAGENTA
-                            + Style.BRIGHT
-                            + val
-                            + Style.RESET_ALL
-                            + m[end:]
+                            + _RESET
                         )
 
             # 翻译重试 / 翻译兜底相关
@@ -299,9 +334,7 @@ def _setup_logging():
                 match = _re.search(pattern, m)
                 if match:
                     num = match.group(1)
-                    m = m[:match.start(1)] + Fore.YELLOW + Style.BRIGHT + num + Style.RESET_ALL + m[match.end(1):]
-                # 高亮兜底模型名
-                m = _color_kv(m, "兜底模型=", Fore.CYAN + Style.BRIGHT)
+                    m = m[:match.start(1)] + _YELLOW_B + num + _RESET + m[match.end(1):]
 
             # 翻译重试已耗尽
             if "翻译重试已耗尽" in m:
@@ -310,7 +343,7 @@ def _setup_logging():
                 match = _re.search(pattern, m)
                 if match:
                     num = match.group(1)
-                    m = m[:match.start(1)] + Fore.RED + Style.BRIGHT + num + Style.RESET_ALL + m[match.end(1):]
+                    m = m[:match.start(1)] + _RED_B + num + _RESET + m[match.end(1):]
 
             # LLM 预检相关
             if "LLM 预检" in m:
@@ -319,15 +352,10 @@ def _setup_logging():
                 task_match = _re.search(r"任务 '([^']+)'", m)
                 if task_match:
                     task_name = task_match.group(1)
-                    m = m.replace(f"'{task_name}'", f"'{Fore.CYAN}{Style.BRIGHT}{task_name}{Style.RESET_ALL}'")
-                # 高亮 provider= 和 model=
-                m = _color_kv(m, "provider=", Fore.YELLOW)
-                m = _color_kv(m, "model=", Fore.MAGENTA + Style.BRIGHT)
+                    m = m.replace(f"'{task_name}'", f"'{_CYAN_B}{task_name}{_RESET}'")
 
             # 总结规划相关
             if "总结规划:" in m:
-                m = _color_kv(m, "原文字符数=", Fore.CYAN)
-                m = _color_kv(m, "预估 tokens=", Fore.YELLOW)
                 # 高亮拆分段数
                 import re as _re
                 split_match = _re.search(r"拆分为\s*(\d+)\s*段", m)
@@ -335,37 +363,9 @@ def _setup_logging():
                     num = split_match.group(1)
                     start_pos = split_match.start(1)
                     end_pos = split_match.end(1)
-                    m = m[:start_pos] + Fore.MAGENTA + Style.BRIGHT + num + Style.RESET_ALL + m[end_pos:]
-
-            # 分段 N/M 相关
-            if m.startswith("分段 "):
-                m = _color_kv(m, "字符数=", Fore.CYAN)
-                m = _color_kv(m, "预估 tokens=", Fore.YELLOW)
-
-            msg_for_display = m
-
-            # Colorize log level for quick scanning
-            if record.levelno >= logging.CRITICAL:
-                level_color = Fore.RED + Style.BRIGHT
-            elif record.levelno >= logging.ERROR:
-                level_color = Fore.RED
-            elif record.levelno >= logging.WARNING:
-                level_color = Fore.YELLOW
-            elif record.levelno >= logging.INFO:
-                level_color = Fore.GREEN
-            else:
-                level_color = Fore.BLUE
+                    m = m[:start_pos] + _MAGENTA_B + num + _RESET + m[end_pos:]
 
-            original_levelname = record.levelname
-            original_msg = record.msg
-            try:
-                record.levelname = f"{level_color}{record.levelname}{Style.RESET_ALL}"
-                record.msg = msg_for_display
-                record.args = ()
-                return super().format(record)
-            finally:
-                record.levelname = original_levelname
-                record.msg = original_msg
+            return self._emit(record, m)
 
     root = logging.getLogger()
     # Force a single uniform StreamHandler on root
@@ -375,37 +375,41 @@ def _setup_logging():
         except Exception:
             pass
 
-    sh = logging.StreamHandler()
     if use_color:
-        fmt = ColorFormatter(base_fmt, date_fmt)
+        # 第三方 logger（apscheduler/httpx 等）的记录不含任何生命周期
+        # 关键字，没必要付 ColorFormatter 的扫描成本：按 logger 名拆成
+        # 两个 handler，第三方走纯文本格式器，mailbot 自己的走彩色格式器
+        class _ThirdPartyFilter(logging.Filter):
+            def filter(self, record: logging.LogRecord) -> bool:
+                return record.name.startswith(_NOISY_LOGGERS)
+
+        class _OwnFilter(logging.Filter):
+            def filter(self, record: logging.LogRecord) -> bool:
+                return not record.name.startswith(_NOISY_LOGGERS)
+
+        plain_handler = logging.StreamHandler()
+        plain_handler.setFormatter(_PLAIN_FORMATTER)
+        plain_handler.addFilter(_ThirdPartyFilter())
+        color_handler = logging.StreamHandler()
+        color_handler.setFormatter(ColorFormatter(base_fmt, date_fmt))
+        color_handler.addFilter(_OwnFilter())
+        root.addHandler(plain_handler)
+        root.addHandler(color_handler)
     else:
-        fmt = logging.Formatter(fmt=base_fmt, datefmt=date_fmt)
-    sh.setFormatter(fmt)
-    root.addHandler(sh)
+        sh = logging.StreamHandler()
+        sh.setFormatter(_PLAIN_FORMATTER)
+        root.addHandler(sh)
     root.setLevel(logging.INFO)
 
-    # Uniformize third-party loggers
-    for name in list(logging.root.manager.loggerDict.keys()):
-        l = logging.getLogger(str(name))
-        l.handlers = []
-        l.propagate = True
-        if str(name).startswith("apscheduler"):
-            l.setLevel(logging.WARNING)  # silence APScheduler info-level noise
-        elif str(name).startswith("httpx") or str(name).startswith("httpcore"):
-            l.setLevel(logging.WARNING)  # silence HTTP request info lines
-        elif str(name).startswith("openai") or str(name).startswith("urllib3") or str(name).startswith("requests"):
-            l.setLevel(logging.WARNING)
-        else:
-            l.setLevel(logging.INFO)
-
-    # Also proactively register common noisy loggers
+    # 只压制已知的高噪声第三方 logger；其余 logger 走 root 的统一 handler，
+    # 不再整表扫描 loggerDict（那会遍历所有被 import 过的模块的 logger）
     for name in ("apscheduler", "apscheduler.scheduler", "apscheduler.executors", "httpx", "httpcore", "openai", "urllib3", "requests"):
         l = logging.getLogger(name)
-        l.handlers = []
-        l.propagate = True
-        if name.startswith("apscheduler"):
-            l.setLevel(logging.WARNING)
-        else:
+        if l.handlers:
+            l.handlers = []
+        if not l.propagate:
+            l.propagate = True
+        if l.level != logging.WARNING:
             l.setLevel(logging.WARNING)
 
     # 完全静默 cssutils 日志（premailer 依赖），避免大量 CSS 属性警告
@@ -417,6 +421,13 @@ def _setup_logging():
 
 
 def start_scheduler():
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.date import DateTrigger
+    from apscheduler.events import EVENT_JOB_MISSED
+    from apscheduler.jobstores.base import JobLookupError
+
+    from .jobs import summarize_job, translate_job, preflight_check_llm
+
     _setup_logging()
     cfg = load_config()
 
@@ -425,11 +436,15 @@ def start_scheduler():
     try:
         preflight_check_llm(cfg)
     except Exception as e:
-        logger.error(f"预检失败，调度器无法启动: {e}")
+        logger.error("预检失败，调度器无法启动: %s", e)
         raise SystemExit(1)
 
     tzname = cfg.get("timezone", "Asia/Shanghai")
-    tz = pytz.timezone(tzname)
+    # zoneinfo 的 ZoneInfo 是按时区名缓存的单例，astimezone/now 只做一次偏移查表，
+    # 不像 pytz 每次调用都要新建带 DST 信息的实例
+    tz = ZoneInfo(tzname)
+    # 日志里统一用固定的时区后缀，避免每条日志在 strftime 里做 %Z 查表
+    tz_suffix = " " + tzname
 
     # Translate interval is measured from finish time (fixed-delay)
     interval_minutes = int(cfg.get("translate", {}).get("interval_minutes", 10))
@@ -439,73 +454,93 @@ def start_scheduler():
         summarize_cfg.get("follow_translate_interval", False)
     )
 
-    # Single-thread critical section to avoid race; summarize has higher priority by policy
-    RUN_LOCK = threading.RLock()
-    summarize_pending = {"flag": False}
+    # 单元素列表代替 dict 包装的布尔：闭包里可变且索引访问不走字符串哈希
+    summarize_pending = [False]
+
+    # AsyncIO 调度器：任务体仍是同步 IMAP/HTTP 代码，下放到单线程执行器里跑，
+    # 事件循环只负责触发，不再被长任务阻塞导致触发漂移。
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    sch = AsyncIOScheduler(timezone=tz, event_loop=loop, job_defaults={"coalesce": True, "max_instances": 1})
 
-    sch = BackgroundScheduler(timezone=tz, job_defaults={"coalesce": True, "max_instances": 1})
+    # 单线程执行器的 FIFO 排队天然串行 summarize/translate，
+    # 不再需要 RUN_LOCK，也不会让触发线程阻塞在 acquire 上占着名额
+    job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mailbot-job")
 
-    def _run_summarize():
-        with RUN_LOCK:
-            t0 = datetime.now(tz)
-            logger.info("START 开始执行机器总结")
+    def _timed(label: str, body, job_cfg: dict):
+        """两类任务共用的计时 + START/DONE 日志 + 兜底异常处理骨架。"""
+        # 只为算耗时，不需要带时区的墙钟；monotonic 也不受 NTP 校时影响
+        t0 = time.monotonic()
+        logger.info("START 开始执行机器%s", label)
+        try:
+            body(job_cfg)
+        except Exception as e:
+            logger.exception("机器%s出错: %s", label, e)
+        finally:
+            dt = int(time.monotonic() - t0)
+            logger.info("DONE 机器%s完成 | 耗时=%ds", label, dt)
+
+    def _summarize_body(job_cfg: dict):
+        max_attempts = 2
+        retry_delay = 5.0
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                max_attempts = 2
-                retry_delay = 5.0
-                attempt = 0
-                while True:
-                    attempt += 1
-                    try:
-                        summarize_job(cfg)
-                        break
-                    except Exception as e:
-                        if _is_imap_disconnect_error(e) and attempt < max_attempts:
-                            logger.warning(
-                                f"IMAP 连接中断，将在 {retry_delay:.0f}s 后重试（{attempt}/{max_attempts}）: {e}"
-                            )
-                            try:
-                                time.sleep(retry_delay)
-                            except Exception:
-                                pass
-                            continue
-                        raise
+                summarize_job(job_cfg)
+                break
             except Exception as e:
-                logger.exception(f"机器总结出错: {e}")
-            finally:
-                dt = int((datetime.now(tz) - t0).total_seconds())
-                logger.info(f"DONE 机器总结完成 | 耗时={dt}s")
+                if _is_imap_disconnect_error(e) and attempt < max_attempts:
+                    logger.warning(
+                        "IMAP 连接中断，将在 %.0fs 后重试（%d/%d）: %s",
+                        retry_delay, attempt, max_attempts, e,
+                    )
+                    try:
+                        time.sleep(retry_delay)
+                    except Exception:
+                        pass
+                    continue
+                raise
+
+    def _run_summarize(job_cfg: dict):
+        _timed("总结", _summarize_body, job_cfg)
+
+    async def _summarize_async(job_cfg: dict):
+        await asyncio.get_running_loop().run_in_executor(job_executor, _run_summarize, job_cfg)
 
     def _schedule_translate_next(delay: timedelta):
         run_at = datetime.now(tz) + delay
-        sch.add_job(_run_translate, DateTrigger(run_date=run_at), id="translate", replace_existing=True)
-        logger.info(f"NEXT 下次机器翻译时间: {run_at.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-
-    def _run_translate():
+        trigger = DateTrigger(run_date=run_at)
+        try:
+            # 条目还在时就地改写触发器，跳过 replace_existing 对 jobstore 的整条重建
+            sch.reschedule_job("translate", trigger=trigger)
+        except JobLookupError:
+            # 一次性 DateTrigger 触发后条目已被移除，重新登记；
+            # 睡眠/挂起唤醒后错过的点在 2 分钟宽限内仍会触发一次（coalesce 合并积压）
+            sch.add_job(_translate_async, trigger, args=(cfg,), id="translate", replace_existing=True, misfire_grace_time=120)
+        logger.info("NEXT 下次机器翻译时间: %s", run_at.strftime('%Y-%m-%d %H:%M:%S') + tz_suffix)
+
+    def _run_translate(job_cfg: dict):
         if follow_translate_interval:
             logger.info(
                 "NEXT 当前配置为'总结跟随翻译间隔'，本轮将先执行机器总结，再执行机器翻译"
             )
-            _run_summarize()
+            _run_summarize(job_cfg)
 
-        with RUN_LOCK:
-            t0 = datetime.now(tz)
-            logger.info("START 开始执行机器翻译")
-            try:
-                translate_job(cfg)
-            except Exception as e:
-                logger.exception(f"机器翻译出错: {e}")
-            finally:
-                dt = int((datetime.now(tz) - t0).total_seconds())
-                logger.info(f"DONE 机器翻译完成 | 耗时={dt}s")
+        _timed("翻译", translate_job, job_cfg)
 
         # schedule next translate from finish time
         _schedule_translate_next(translate_delay)
 
         # if summarize was delayed while translating, run catch-up immediately
-        if (not follow_translate_interval) and summarize_pending.get("flag"):
-            summarize_pending["flag"] = False
-            sch.add_job(_run_summarize, DateTrigger(run_date=datetime.now(tz) + timedelta(seconds=1)), id="summarize-catchup", replace_existing=True)
-            logger.info("FLAG 检测到错过的总结任务，本次翻译结束后将立即补跑一次总结")
+        if (not follow_translate_interval) and summarize_pending[0]:
+            summarize_pending[0] = False
+            logger.info("FLAG 检测到错过的总结任务，本次翻译结束后立即补跑一次总结")
+            # 直接在当前工作线程补跑，省掉一次 add_job + 触发器唤醒的调度往返
+            _run_summarize(job_cfg)
+
+    async def _translate_async(job_cfg: dict):
+        await asyncio.get_running_loop().run_in_executor(job_executor, _run_translate, job_cfg)
 
     # Summarize jobs (strict on-the-hour cron). If missed, run ASAP afterwards
     summarize_specs = summarize_cfg.get("cron", ["0 7 * * *", "0 12 * * *", "0 19 * * *"])
@@ -514,7 +549,7 @@ def start_scheduler():
     else:
         for spec in summarize_specs:
             jid = f"summarize:{spec}"
-            sch.add_job(_run_summarize, CronTrigger.from_crontab(spec, timezone=tz), id=jid, misfire_grace_time=3600)
+            sch.add_job(_summarize_async, _parse_cron(spec, tzname), args=(cfg,), id=jid, misfire_grace_time=3600)
 
     # Translate is scheduled as a one-shot; after each finish it re-schedules itself
     _schedule_translate_next(timedelta(seconds=1))
@@ -522,45 +557,90 @@ def start_scheduler():
     # Listen for missed summarize runs (e.g., blocked by translate)
     def _listener(event):
         try:
-            if event.code == EVENT_JOB_MISSED and isinstance(getattr(event, "job_id", ""), str):
-                if str(event.job_id).startswith("summarize"):
-                    summarize_pending["flag"] = True
-                    logger.info("WARN 检测到定时总结错过执行，将在当前翻译任务结束后立即补跑")
+            # JobEvent 保证 job_id 是 str，直接判断前缀即可
+            jid = event.job_id
+            if event.code == EVENT_JOB_MISSED and jid and jid.startswith("summarize"):
+                summarize_pending[0] = True
+                logger.info("WARN 检测到定时总结错过执行，将在当前翻译任务结束后立即补跑")
         except Exception:
             pass
 
-    sch.add_listener(_listener, EVENT_JOB_MISSED)
+    # 总结跟随翻译间隔时没有 cron 总结任务可错过，监听器纯属空转，不注册
+    if not follow_translate_interval:
+        sch.add_listener(_listener, EVENT_JOB_MISSED)
 
     # Startup banner + next runs
     logger.info("START 启动调度器...")
 
+    # 复杂 cron 表达式的 get_next_fire_time 并不便宜；在算出的触发点到来之前
+    # 同一任务的答案不会变化，按 job id 记忆化即可
+    _next_fire_cache: dict[str, datetime] = {}
+
+    # 重启时若 cron 规格未变，直接复用上次进程算好的下次触发点做横幅展示。
+    # 只持久化 summarize:* 的 cron 条目；translate 是自续期的一次性任务，跨进程无意义
+    next_fire_path = Path(__file__).resolve().parents[1] / 'data' / 'next_fire.json'
+    spec_hash = hashlib.sha1(
+        json.dumps(list(summarize_specs), ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    try:
+        payload = json.loads(next_fire_path.read_text(encoding='utf-8'))
+        if payload.get('spec_hash') == spec_hash:
+            now0 = datetime.now(tz)
+            for jid, iso in (payload.get('next') or {}).items():
+                if not jid.startswith('summarize:'):
+                    continue
+                dtv = datetime.fromisoformat(iso)
+                if dtv > now0:
+                    _next_fire_cache[jid] = dtv
+    except Exception:
+        pass
+
+    def _persist_next_fire():
+        try:
+            next_fire_path.parent.mkdir(parents=True, exist_ok=True)
+            next_fire_path.write_text(
+                json.dumps({
+                    'spec_hash': spec_hash,
+                    'next': {
+                        jid: dt.isoformat()
+                        for jid, dt in _next_fire_cache.items()
+                        if jid.startswith('summarize:')
+                    },
+                }, ensure_ascii=False),
+                encoding='utf-8',
+            )
+        except Exception:
+            pass
+
     def _safe_next_time(job):
         try:
-            nrt = getattr(job, 'next_run_time', None)
-            if nrt is None:
-                trig = getattr(job, 'trigger', None)
-                if trig is not None:
-                    try:
-                        now = datetime.now(tz)
-                        nrt = trig.get_next_fire_time(None, now)
-                    except Exception:
-                        nrt = None
-            if nrt and hasattr(nrt, 'astimezone'):
-                try:
-                    return nrt.astimezone(tz)
-                except Exception:
-                    return nrt
+            now = datetime.now(tz)
+            cached = _next_fire_cache.get(job.id)
+            if cached is not None and cached > now:
+                return cached
+            # 横幅在 sch.start() 之前打印，pending 任务此时还没有 next_run_time，
+            # 需要退回 trigger 直接求值；启动后的调用走上面的属性/缓存快路径
+            nrt = getattr(job, 'next_run_time', None) or job.trigger.get_next_fire_time(None, now)
+            if nrt is not None:
+                # ZoneInfo 同名实例是缓存单例，触发器本来就带目标时区时
+                # 不必再做一次 astimezone 换算
+                if nrt.tzinfo is not tz:
+                    nrt = nrt.astimezone(tz)
+                _next_fire_cache[job.id] = nrt
             return nrt
         except Exception:
             return None
 
-    for j in sch.get_jobs():
-        when = _safe_next_time(j)
-        when_s = when.strftime("%Y-%m-%d %H:%M:%S %Z") if when else "N/A"
-        logger.info(f"NEXT 下次运行时间 {when_s} -> {j.id}")
+    # INFO 被关掉时（如 systemd 下抬高阈值）连 get_jobs/strftime 都不必做
+    if logger.isEnabledFor(logging.INFO):
+        for j in sch.get_jobs():
+            when = _safe_next_time(j)
+            when_s = (when.strftime("%Y-%m-%d %H:%M:%S") + tz_suffix) if when else "N/A"
+            logger.info("NEXT 下次运行时间 %s -> %s", when_s, j.id)
+    _persist_next_fire()
 
     # 设置信号处理器，收到 Ctrl+C 时强制立即退出
-    # APScheduler 的 BlockingScheduler.start() 会吞掉 KeyboardInterrupt 并调用 shutdown(wait=True)
+    # APScheduler 的 shutdown(wait=True) 会等待正在执行的任务结束，
     # 导致程序无法立即退出，需要用信号处理器强制退出
     def _force_exit(signum, frame):
         logger.info("WARN 收到 Ctrl+C，强制退出（不等待当前任务完成）")
@@ -571,6 +651,16 @@ def start_scheduler():
         # 强制退出进程，不等待线程完成
         os._exit(0)
 
+    # 可选：把进程钉在指定 CPU 上（Linux），保持调度器热数据的缓存亲和性。
+    # 默认不钉——翻译/扫描阶段有多线程并发，盲目钉单核反而降并行度
+    scheduler_cpu = cfg.get("scheduler_cpu")
+    if scheduler_cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {int(scheduler_cpu)})
+            logger.info("调度器已绑定到 CPU %d", int(scheduler_cpu))
+        except Exception as e:
+            logger.info("CPU 绑定失败，忽略: %s", e)
+
     # 注册 SIGINT 处理器（Ctrl+C）
     signal.signal(signal.SIGINT, _force_exit)
     # Windows 上 SIGTERM 可能不可用，但尝试注册
@@ -581,13 +671,23 @@ def start_scheduler():
 
     try:
         sch.start()
+        loop.run_forever()
     except KeyboardInterrupt:
-        # 这个分支可能不会被触发（APScheduler 会吞掉），但保留作为后备
+        # 信号处理器一般会先行退出，这个分支保留作为后备
         logger.info("WARN 收到 Ctrl+C，立即停止调度器")
         try:
             sch.shutdown(wait=False)
         except Exception:
             pass
+    finally:
+        try:
+            job_executor.shutdown(wait=False)
+        except Exception:
+            pass
+        try:
+            loop.close()
+        except Exception:
+            pass
 
 
 if __name__ == '__main__':
@@ -1,28 +1,56 @@
 from .imap_client import (
-    connect,
+    lease_imap,
+    release_imap,
     search_unseen_without_prefix,
-    fetch_raw,
+    fetch_raw_bulk,
+    list_headers,
     parse_message,
     build_email,
     append_unseen,
     mark_seen,
+    mark_seen_bulk,
     pick_html_or_text,
 )
 import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from premailer import transform as inline_css
+import orjson
 from .jobs import (
-    _save_summary_payload,
+    _BULLET_RE,
+    _HTML_ESCAPE,
+    _SummaryRunLog,
     deepseek_summarize,
     _get_llm_task_config,
     _build_openai_for_task,
     _article_card_html,
 )
-from .utils import rough_token_count
+from .llm_cache import LLMCache, request_key
+from .utils import decode_subject, load_prompt, rough_token_count
 
 logger = logging.getLogger("mailbot")
 
+# 摘要邮件模板里的固定 HTML 片段：提到模块级只构建一次，
+# 每次发信只剩一趟 list append + "".join
+_DIGEST_HEAD = (
+    '<html><body>'
+    '<div style="max-width:760px;margin:0 auto;font-family:-apple-system,'
+    'BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif;color:#1f2937;">'
+    '<div style="background:#f3f4f6;border:1px solid #e5e7eb;border-radius:8px;'
+    'padding:12px 16px;margin:12px 0;">'
+)
+_DIGEST_LIST_OPEN = '</div><ol style="margin:0;padding-left:20px;">'
+_DIGEST_CARD_OPEN = '<li style="margin-bottom:14px;"><div style="font-weight:600; margin-bottom:6px;">'
+_DIGEST_CARD_MID = '</div>'
+_DIGEST_CARD_CLOSE = '</li>'
+_DIGEST_TAIL = (
+    '</ol>'
+    '<div style="margin-top:12px;font-size:12px;color:#9ca3af;">自动生成 · 如有误请忽略</div>'
+    '</div></body></html>'
+)
+
 
 def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
     imap = cfg["imap"]
@@ -30,7 +58,8 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
     exclude = [cfg.get("prefix", {}).get("translate", "[机器翻译]"), cfg.get("prefix", {}).get("summarize", "[机器总结]")]
     sum_cfg = cfg.get("summarize", {})
     save_summary_json = bool(sum_cfg.get("save_summary_json", True))
-    client = connect(imap["server"], imap["email"], imap["password"], port=imap.get("port", 993), ssl=True)
+    # 复用进程内缓存的连接，省掉每次手动总结的 TLS+LOGIN 握手
+    client = lease_imap(imap["server"], imap["email"], imap["password"], port=imap.get("port", 993), ssl=True)
 
     try:
         uids = search_unseen_without_prefix(
@@ -41,19 +70,32 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
             robust=True,
             fetch_chunk=int(sum_cfg.get('unseen_fetch_chunk', 500)),
         )
-        logger.info(f"Summarize once: scanning folder {folder}, UNSEEN={len(uids)} (robust, auto-generated excluded)")
+        logger.info("Summarize once: scanning folder %s, UNSEEN=%s (robust, auto-generated excluded)", folder, len(uids))
         # client-side filter to avoid non-ASCII SEARCH
-        filtered = []
+        # 过滤只看 Subject：先批量拉头部挑出幸存者，再只为它们传输正文。
+        # 机器前缀固定出现在主题开头，startswith 元组一次 C 级扫描即可
+        exclude_t = tuple(exclude)
+        hdrs = list_headers(client, uids)
+        survivors = []
         for uid in uids:
-            raw = fetch_raw(client, uid)
+            hdr = hdrs.get(uid)
+            if hdr is not None:
+                # decode_header 一次解出可读主题：MIME 编码主题也能命中
+                # 前缀过滤，且日志/后续展示复用同一份解码结果
+                sub = decode_subject(hdr)
+                if sub.startswith(exclude_t):
+                    continue
+                logger.info("Detected subject (summarize once): %s (uid=%s)", sub, uid)
+            survivors.append(uid)
+            if len(survivors) >= batch:
+                break
+        filtered = []
+        for uid, raw in fetch_raw_bulk(client, survivors):
             msg = parse_message(raw)
-            sub = str(msg.get("Subject", ""))
-            if any(p in sub for p in exclude):
+            sub = decode_subject(msg)
+            if sub.startswith(exclude_t):
                 continue
-            logger.info(f"Detected subject (summarize once): {sub} (uid={uid})")
-            filtered.append((uid, msg))
-            if len(filtered) >= batch:
-                break
+            filtered.append((uid, msg, sub))
 
         # 一次性「手动触发总结」任务使用独立的 LLM 任务配置
         task = _get_llm_task_config(
@@ -75,7 +117,7 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
         thinking_budget = int(task["thinking_budget"])
         use_mock = bool(task["mock"])
         prompt_path = Path(task.get("prompt_file") or "Prompt.txt")
-        prompt = prompt_path.read_text(encoding="utf-8") if prompt_path.exists() else "Summarize in Chinese."
+        prompt = load_prompt(prompt_path, "Summarize in Chinese.")
         cli = _build_openai_for_task(task)
 
         # 手动一次性总结的兜底模型配置（与 summarize_job 保持一致）
@@ -105,9 +147,10 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
 
         if not use_mock:
             logger.info(
-                f"Summarize-once LLM configured: provider={provider_kind}, model={model}, "
-                f"enable_thinking={enable_thinking}, thinking_budget={thinking_budget}, "
-                f"fallback_model={fallback_model or '(none)'}"
+                "Summarize-once LLM configured: provider=%s, model=%s, "
+                "enable_thinking=%s, thinking_budget=%s, fallback_model=%s",
+                provider_kind, model, enable_thinking, thinking_budget,
+                fallback_model or "(none)",
             )
         else:
             logger.info("Summarize-once LLM configured: mock mode enabled (no external LLM calls)")
@@ -115,7 +158,7 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
         # create a run file early with meta
         run_start = datetime.now()
         run_ts = run_start.strftime('%Y%m%d-%H%M%S')
-        run_path = (Path(__file__).resolve().parents[1] / 'data' / f'summarize-{run_ts}.json') if save_summary_json else None
+        run_path = (Path(__file__).resolve().parents[1] / 'data' / f'summarize-{run_ts}.jsonl') if save_summary_json else None
         meta = {
             "mode": "once",
             "folder": folder,
@@ -130,22 +173,24 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
             "run_id": run_ts,
             "entries_written": 0,
         }
-        def _maybe_save(entries: list[dict]):
-            if save_summary_json and run_path:
-                _save_summary_payload(entries, path=run_path, meta=meta)
-
-        _maybe_save([])
+        run_log = _SummaryRunLog(run_path)
+        run_log.save_meta(meta)
 
         if not filtered:
             meta["end_time"] = datetime.now().isoformat(timespec='seconds')
-            _maybe_save([])
+            run_log.save_meta(meta)
             return None
 
         items = []
         submitted_entries: list[dict] = []
-        for idx_pair, (uid, msg) in enumerate(filtered, start=1):
-            sub = str(msg.get("Subject", ""))
-            logger.info(f"Processing subject (summarize once): {sub} (uid={uid})")
+
+        # 先串行做轻量准备（取正文、截取片段），把真正耗时的 LLM 调用
+        # 收集成互相独立的任务
+        work: list[tuple] = []
+        for uid, msg, sub in filtered:
+            # 主题在过滤循环里已解码过一次，随元组带过来，避免重复
+            # 走 email.Header 的解码路径
+            logger.info("Processing subject (summarize once): %s (uid=%s)", sub, uid)
             html, text = pick_html_or_text(msg)
             plain = text or (html or "")
             if not plain:
@@ -156,9 +201,15 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
             snippet = plain[:4000]
             sn_chars = len(snippet)
             sn_tokens = rough_token_count(snippet)
-            logger.info(f"Summarize-once plan: total chars={total_chars}, ~tokens={total_tokens} → snippet chars={sn_chars}, ~tokens={sn_tokens}")
-            # call model and record outputs
-            meta_extra: dict = {}
+            logger.info("Summarize-once plan: total chars=%s, ~tokens=%s → snippet chars=%s, ~tokens=%s", total_chars, total_tokens, sn_chars, sn_tokens)
+            work.append((uid, msg, sub, snippet, sn_chars, sn_tokens))
+
+        # 相同 (prompt, 片段, model) 的请求直接复用历史应答；重跑同一批
+        # UID 调试时 LLM 花费归零
+        llm_cache = LLMCache() if (not use_mock and bool(sum_cfg.get("llm_cache", True))) else None
+
+        def _summarize_one(snippet: str) -> tuple:
+            """调用主模型（必要时兜底），返回结果与实际使用的模型参数。"""
             used_fallback = False
             used_model = model
             used_enable_thinking = enable_thinking
@@ -166,48 +217,98 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
 
             if use_mock:
                 # mock 模式仅使用本地模拟摘要
-                summ, thinking, meta_extra = ("- mock summary", "", {})
-            else:
-                summ, thinking, meta_extra = deepseek_summarize(
-                    cli,
-                    model,
+                return ("- mock summary", "", {}, used_fallback, used_model, used_enable_thinking, used_thinking_budget)
+
+            cache_key = request_key(prompt, snippet, model) if llm_cache is not None else None
+            if llm_cache is not None:
+                hit = llm_cache.get(cache_key)
+                if hit and hit.get("summ"):
+                    return (
+                        hit["summ"],
+                        hit.get("thinking", ""),
+                        hit.get("meta_extra") or {},
+                        False,
+                        hit.get("model", model),
+                        used_enable_thinking,
+                        used_thinking_budget,
+                    )
+
+            summ, thinking, meta_extra = deepseek_summarize(
+                cli,
+                model,
+                prompt,
+                snippet,
+                enable_thinking,
+                thinking_budget,
+                timeout=timeout,
+                expect_json=bool(task.get("expect_json", True)),
+                provider=provider_kind,
+                stream=bool(task.get("stream", False)),
+            )
+
+            # 主模型失败时，尝试 summarize_fallback
+            if summ == "(summary timeout or error)" and fallback_model and fallback_cli is not None:
+                logger.warning("Summarize-once 主模型失败，尝试兜底模型: %s", fallback_model)
+                fsumm, fthinking, fmeta = deepseek_summarize(
+                    fallback_cli,
+                    fallback_model,
                     prompt,
                     snippet,
-                    enable_thinking,
-                    thinking_budget,
-                    timeout=timeout,
-                    expect_json=bool(task.get("expect_json", True)),
-                    provider=provider_kind,
-                    stream=bool(task.get("stream", False)),
+                    fallback_enable_thinking,
+                    fallback_thinking_budget,
+                    timeout=fallback_timeout,
+                    expect_json=bool(fallback_task.get("expect_json", task.get("expect_json", True))),
+                    provider=str(fallback_task.get("provider") or provider_kind),
+                    stream=bool(fallback_task.get("stream", False)),
                 )
+                if fsumm != "(summary timeout or error)":
+                    summ, thinking, meta_extra = fsumm, fthinking, (fmeta or {})
+                    used_fallback = True
+                    used_model = fallback_model
+                    used_enable_thinking = fallback_enable_thinking
+                    used_thinking_budget = fallback_thinking_budget
+                    logger.info("Summarize-once 兜底模型总结成功")
 
-                # 主模型失败时，尝试 summarize_fallback
-                if summ == "(summary timeout or error)" and fallback_model and fallback_cli is not None:
-                    logger.warning(f"Summarize-once 主模型失败，尝试兜底模型: {fallback_model}")
-                    fsumm, fthinking, fmeta = deepseek_summarize(
-                        fallback_cli,
-                        fallback_model,
-                        prompt,
-                        snippet,
-                        fallback_enable_thinking,
-                        fallback_thinking_budget,
-                        timeout=fallback_timeout,
-                        expect_json=bool(fallback_task.get("expect_json", task.get("expect_json", True))),
-                        provider=str(fallback_task.get("provider") or provider_kind),
-                        stream=bool(fallback_task.get("stream", False)),
-                    )
-                    if fsumm != "(summary timeout or error)":
-                        summ, thinking, meta_extra = fsumm, fthinking, (fmeta or {})
-                        used_fallback = True
-                        used_model = fallback_model
-                        used_enable_thinking = fallback_enable_thinking
-                        used_thinking_budget = fallback_thinking_budget
-                        logger.info("Summarize-once 兜底模型总结成功")
+            if llm_cache is not None and summ != "(summary timeout or error)":
+                llm_cache.put(cache_key, {
+                    "summ": summ,
+                    "thinking": thinking,
+                    "meta_extra": meta_extra or {},
+                    "model": used_model,
+                })
 
-            try:
-                import json as _json
+            return (summ, thinking, meta_extra or {}, used_fallback, used_model, used_enable_thinking, used_thinking_budget)
+
+        # 同一批 Alert 常有正文完全一致的重复邮件（同一来源多次投递），
+        # 每个唯一片段只问一次 LLM，结果按片段映射回各封邮件
+        uniq_snippets: list[str] = []
+        uniq_index: dict[str, int] = {}
+        for it in work:
+            if it[3] not in uniq_index:
+                uniq_index[it[3]] = len(uniq_snippets)
+                uniq_snippets.append(it[3])
+        if len(uniq_snippets) < len(work):
+            logger.info("Summarize-once 批内去重: %s 封邮件合并为 %s 个唯一片段", len(work), len(uniq_snippets))
 
-                parsed = _json.loads(summ)
+        # 每封邮件的总结调用都在等提供商推理，互相独立，用线程池并发发出；
+        # executor.map 按 work 原顺序返回，卡片顺序与串行版一致
+        results: list[tuple] = []
+        if work:
+            max_workers = min(len(uniq_snippets), int(sum_cfg.get("max_concurrency", 4)) or 1)
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                    uniq_results = list(ex.map(_summarize_one, uniq_snippets))
+            else:
+                uniq_results = [_summarize_one(sn) for sn in uniq_snippets]
+            results = [uniq_results[uniq_index[it[3]]] for it in work]
+        if llm_cache is not None:
+            llm_cache.close()
+
+        for (uid, msg, sub, snippet, sn_chars, sn_tokens), (
+            summ, thinking, meta_extra, used_fallback, used_model, used_enable_thinking, used_thinking_budget,
+        ) in zip(work, results):
+            try:
+                parsed = orjson.loads(summ)
             except Exception:
                 parsed = None
             # record single-chunk payload for summarize_once
@@ -254,63 +355,56 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
                         rendered = f"<div style=\"color:#888;\">{reason}</div>"
                     else:
                         rendered = "<div style=\"color:#888;\">本次 Alert 中的论文与当前研究方向相关性较低，未推荐具体文章。</div>"
-                items.append((msg, rendered))
+                items.append((sub, rendered))
             else:
-                items.append((msg, summ))
-            # checkpoint after each item
+                items.append((sub, summ))
+            run_log.append(entry)
+            # checkpoint after each item（entry 行已随写随刷，只需刷 meta）
             meta["entries_written"] = len(submitted_entries)
             meta["last_update"] = datetime.now().isoformat(timespec='seconds')
-            _maybe_save(submitted_entries)
+            run_log.save_meta(meta)
         if not items:
             meta["end_time"] = datetime.now().isoformat(timespec='seconds')
-            _maybe_save(submitted_entries)
+            run_log.save_meta(meta)
+            run_log.close()
             return None
 
         def _bullets(text: str) -> str:
-            lines = [l.strip() for l in (text or '').splitlines()]
-            lis = []
-            for l in lines:
-                if not l:
-                    continue
-                if l.startswith(('- ', '• ', '* ')):
-                    l = l[2:].strip()
-                lis.append(f"<li>{l}</li>")
+            lis = [f"<li>{m}</li>" for m in _BULLET_RE.findall(text or '')]
             return "<ul style=\"margin:0; padding-left:18px;\">" + "".join(lis) + "</ul>"
 
         now = datetime.now().strftime('%Y-%m-%d %H:%M')
         def _looks_like_html(s: str) -> bool:
+            # 不做 strip 拷贝：跳过前导空白看首字符，再各做一次 find
             if not s:
                 return False
-            s = s.strip()
-            return s.startswith('<') and ('</' in s or '/>' in s)
+            i = 0
+            n = len(s)
+            while i < n and s[i] in ' \t\r\n':
+                i += 1
+            return i < n and s[i] == '<' and (s.find('</', i + 1) != -1 or s.find('/>', i + 1) != -1)
 
-        cards = []
-        for m, summ in items:
-            subj = str(m.get('Subject','') or '')
+        # 平铺的片段列表 + 一次 join，避免 f-string 嵌套产生的中间字符串
+        parts: list[str] = [
+            _DIGEST_HEAD,
+            f'<div style="font-size:16px;font-weight:600;">机器总结 · {folder}</div>',
+            f'<div style="font-size:12px;color:#6b7280;">生成时间：{now}</div>',
+            _DIGEST_LIST_OPEN,
+        ]
+        # 过滤环节解码过的主题随元组带到这里，不再回头查 Message 头
+        for sub, summ in items:
+            subj = sub.translate(_HTML_ESCAPE)
             body = (summ if _looks_like_html(summ) else _bullets(summ)) if summ else "<div style=\"color:#888;\">(empty)</div>"
-            cards.append(
-                f"""
-                <li style=\"margin-bottom:14px;\">
-                  <div style=\"font-weight:600; margin-bottom:6px;\">{subj}</div>
-                  {body}
-                </li>
-                """
-            )
-        body_html = f"""
-        <html>
-          <body>
-            <div style=\"max-width:760px;margin:0 auto;font-family:-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif;color:#1f2937;\">
-              <div style=\"background:#f3f4f6;border:1px solid #e5e7eb;border-radius:8px;padding:12px 16px;margin:12px 0;\">
-                <div style=\"font-size:16px;font-weight:600;\">机器总结 · {folder}</div>
-                <div style=\"font-size:12px;color:#6b7280;\">生成时间：{now}</div>
-              </div>
-              <ol style=\"margin:0;padding-left:20px;\">{''.join(cards)}</ol>
-              <div style=\"margin-top:12px;font-size:12px;color:#9ca3af;\">自动生成 · 如有误请忽略</div>
-            </div>
-          </body>
-        </html>
-        """
-        body_html = inline_css(body_html)
+            parts.append(_DIGEST_CARD_OPEN)
+            parts.append(subj)
+            parts.append(_DIGEST_CARD_MID)
+            parts.append(body)
+            parts.append(_DIGEST_CARD_CLOSE)
+        parts.append(_DIGEST_TAIL)
+        body_html = "".join(parts)
+        # 模板已全内联 style=，premailer 走一遍纯属重解析；默认关闭
+        if bool(sum_cfg.get("inline_css_enabled", False)):
+            body_html = inline_css(body_html)
         out = build_email(
             subject=f"[机器总结] {len(items)} 封邮件汇总",
             from_addr=imap["email"],
@@ -319,15 +413,15 @@ def summarize_once(cfg: dict, folder: str | None = None, batch: int = 5):
             text=None,
         )
         append_unseen(client, folder, out)
-        logger.info(f"Appended summary (once): [机器总结] {len(items)} 封邮件汇总")
-        for uid in uids:
-            mark_seen(client, folder, uid)
+        logger.info("Appended summary (once): [机器总结] %s 封邮件汇总", len(items))
+        mark_seen_bulk(client, folder, uids)
         # persist submitted payloads for this run
         meta["end_time"] = datetime.now().isoformat(timespec='seconds')
-        _maybe_save(submitted_entries)
+        run_log.save_meta(meta)
+        run_log.close()
         return len(items)
     finally:
         try:
-            client.logout()
+            release_imap(client, broken=sys.exc_info()[0] is not None)
         except Exception:
             pass
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("mailbot")
+
+_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_TM_PATH = _ROOT / 'data' / 'translation_memory.sqlite3'
+# 退稿/退订页脚这类样板文本会在很长周期内重复出现，默认保留 30 天
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+
+def norm_hash(text: str) -> bytes:
+    """Stable cache key: sha1 over whitespace-normalized source text."""
+    normalized = " ".join((text or '').split())
+    return hashlib.sha1(normalized.encode('utf-8')).digest()
+
+
+class TM:
+    """SQLite-backed translation memory shared across runs.
+
+    同一模型 + 相同归一化源文只调用一次远程翻译；Google Scholar 快讯、
+    退订页脚等机器生成文本的跨邮件/跨运行命中率很高。数据库不可用时
+    所有操作退化为 no-op，不影响主流程。
+    """
+
+    def __init__(self, path: Path | str | None = None, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = Path(path) if path else DEFAULT_TM_PATH
+        self.ttl = int(ttl_seconds)
+        self.lock = threading.Lock()
+        self.conn: sqlite3.Connection | None = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tm("
+                "model TEXT, h BLOB, tr TEXT, ts INTEGER, "
+                "PRIMARY KEY(model, h))"
+            )
+            conn.commit()
+            self.conn = conn
+        except Exception as e:
+            logger.info(f"翻译记忆库不可用，跳过持久缓存: {e}")
+            self.conn = None
+
+    def get(self, model: str, key: bytes) -> str | None:
+        if self.conn is None:
+            return None
+        with self.lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT tr, ts FROM tm WHERE model=? AND h=?", (model or '', key)
+                ).fetchone()
+            except Exception:
+                return None
+        if not row:
+            return None
+        tr, ts = row
+        if self.ttl > 0 and (time.time() - (ts or 0)) > self.ttl:
+            return None
+        return tr or None
+
+    def put(self, model: str, key: bytes, value: str):
+        if self.conn is None or not value:
+            return
+        with self.lock:
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tm(model, h, tr, ts) VALUES(?,?,?,?)",
+                    (model or '', key, value, int(time.time())),
+                )
+                self.conn.commit()
+            except Exception:
+                pass
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
@@ -1,8 +1,30 @@
 from __future__ import annotations
 from email.header import decode_header
 from email.message import Message
+from pathlib import Path
 from typing import Iterable
 
+# Prompt 文件按 (mtime, size) 缓存解码结果：cron 模式下每轮任务
+# 都会重读提示词，文件本身却很少变化
+_PROMPT_CACHE: dict[Path, tuple[float, int, str]] = {}
+
+
+def load_prompt(path: Path, default: str = '') -> str:
+    """Read a UTF-8 prompt file, reusing the decoded text until it changes on disk."""
+    try:
+        st = path.stat()
+    except OSError:
+        return default
+    ent = _PROMPT_CACHE.get(path)
+    if ent is not None and ent[0] == st.st_mtime and ent[1] == st.st_size:
+        return ent[2]
+    try:
+        text = path.read_text(encoding='utf-8')
+    except Exception:
+        return default
+    _PROMPT_CACHE[path] = (st.st_mtime, st.st_size, text)
+    return text
+
 
 def decode_subject(msg: Message) -> str:
     raw = msg.get('Subject', '')
@@ -47,9 +69,16 @@ def rough_token_count(text: str) -> int:
     """
     if not text:
         return 0
+    # Fast path: pure-ASCII text needs no ratio scan at all
+    if text.isascii():
+        return max(1, len(text) >> 2)
     try:
-        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
-        ratio = ascii_chars / max(1, len(text))
+        # 比例在前几 KB 内已足够稳定；长文本只采样开头，避免整篇逐字符扫描。
+        # ASCII 计数走 encode('ascii','ignore')：一次 C 级扫描，
+        # 不再在 Python 层逐字符 ord()
+        sample = text if len(text) <= 2048 else text[:2048]
+        ascii_chars = len(sample.encode('ascii', 'ignore'))
+        ratio = ascii_chars / max(1, len(sample))
     except Exception:
         ratio = 0.0
     if ratio >= 0.7: